@@ -13,12 +13,19 @@
 # limitations under the License.
 
 import collections
+import hashlib
 import json
 import logging
+import re
 import requests
 from urllib.parse import urljoin
 
 from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.dispatch import Signal
+from django.utils import translation
 from django.utils.translation import gettext_lazy as _
 
 from horizon import exceptions
@@ -40,9 +47,36 @@ TASK = collections.namedtuple('Task',
                                'created_on', 'approved_on', 'page',
                                'completed_on', 'actions', 'status'])
 
+# NOTE(adriant): Task lists only need the actions to work out if a task is
+# valid, so list rows compute that up front and drop the (potentially huge)
+# action data rather than holding it for every row on the page.
+TASK_ROW = collections.namedtuple('TaskRow',
+                                  ['id', 'task_type', 'valid',
+                                   'request_by', 'request_project',
+                                   'created_on', 'approved_on', 'page',
+                                   'completed_on', 'status'])
+
+# The subset of a task document that TASK_ROW needs. Backends that support
+# field selection on list endpoints return 'valid' precomputed rather than
+# every action's data.
+TASK_LIST_FIELDS = ['uuid', 'task_type', 'keystone_user', 'cancelled',
+                    'created_on', 'approved_on', 'completed_on', 'valid']
+
 NOTIFICATION = collections.namedtuple('Notification',
                                       ['uuid', 'notes', 'error', 'created_on',
-                                       'acknowledged', 'task'])
+                                       'acknowledged', 'task',
+                                       'task_type', 'task_status',
+                                       'notes_truncated'],
+                                      defaults=(None, None, False))
+
+NOTIFICATION_GROUP = collections.namedtuple('NotificationGroup',
+                                            ['id', 'task', 'error',
+                                             'signature', 'count',
+                                             'first_created_on',
+                                             'last_created_on',
+                                             'notification_ids',
+                                             'task_type', 'task_status'],
+                                            defaults=(None, None))
 
 QUOTA_SIZE = collections.namedtuple('QuotaSize',
                                     ['id', 'name', 'cinder',
@@ -122,15 +156,47 @@ ROLE_TRANSLATIONS = {
 }
 
 
+# Lookup tables built from settings, the first time they're needed. Table
+# and cell rendering look these up thousands of times per page.
+_lookup_tables = {}
+
+
+def _settings_lookup(setting, default, build):
+    try:
+        return _lookup_tables[setting]
+    except KeyError:
+        value = getattr(settings, setting, None)
+        if value is None:
+            value = default
+        table = _lookup_tables[setting] = build(value)
+        return table
+
+
+def _translated_lookup(setting, default):
+    # Translations are resolved once for each language they're asked for.
+    translations = _settings_lookup(setting, default, lambda value: {})
+    language = translation.get_language()
+    try:
+        return translations[language]
+    except KeyError:
+        value = getattr(settings, setting, None)
+        if value is None:
+            value = default
+        table = translations[language] = dict(
+            (name, text.format()) for name, text in value.items())
+        return table
+
+
+@receiver(setting_changed)
+def _reset_lookup_tables(setting, **kwargs):
+    _lookup_tables.pop(setting, None)
+
+
 def get_role_text(name):
     # Gets the role text for a given role.
     # If it doesn't exist will simply return the role name.
-    role_translations = getattr(settings, 'ROLE_TRANSLATIONS', None)
-    if role_translations is None:
-        role_translations = ROLE_TRANSLATIONS
-    if name in role_translations:
-        return role_translations[name].format()
-    return name
+    return _translated_lookup('ROLE_TRANSLATIONS',
+                              ROLE_TRANSLATIONS).get(name, name)
 
 
 SERVICE_TRANSLATIONS = {
@@ -144,15 +210,162 @@ SERVICE_TRANSLATIONS = {
 def get_service_type(name):
     # Takes service names and returns a 'nice' name of where they
     # are from
-    service_translations = getattr(settings, 'SERVICE_TRANSLATIONS', None)
-    if service_translations is None:
-        service_translations = SERVICE_TRANSLATIONS
-    if name in service_translations:
-        return service_translations[name].format()
-    return name
+    return _translated_lookup('SERVICE_TRANSLATIONS',
+                              SERVICE_TRANSLATIONS).get(name, name)
+
+
+# NOTE(adriant): Task action data and notes can be arbitrarily large, so
+# the task detail tabs only render this many characters of each and fetch
+# the rest on demand. Can be overriden in the local_settings file:
+# TASK_DATA_PREVIEW_SIZE = <number of characters>
+TASK_DATA_PREVIEW_SIZE = 4096
+
+# How long (in seconds) pretty printed task payloads are kept for.
+TASK_PAYLOAD_CACHE_TIMEOUT = 300
+
+
+def get_task_data_preview_size():
+    return getattr(settings, 'TASK_DATA_PREVIEW_SIZE', TASK_DATA_PREVIEW_SIZE)
+
+
+def json_preview(value, limit, indent=4):
+    """Pretty prints value as JSON, stopping after limit characters.
+
+    Returns a (text, truncated) tuple. The value is encoded incrementally
+    so a large payload is never serialised in full just to be cut short.
+    """
+    if isinstance(value, str):
+        return value[:limit], len(value) > limit
+
+    chunks = []
+    size = 0
+    for chunk in json.JSONEncoder(indent=indent).iterencode(value):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size > limit:
+            return ''.join(chunks)[:limit], True
+    return ''.join(chunks), False
+
+
+# Notification lists only carry this many characters of each
+# notification's notes, the rest is shown on the detail page. Can be
+# overriden in the local_settings file:
+# NOTIFICATION_NOTES_PREVIEW_SIZE = <number of characters>
+NOTIFICATION_NOTES_PREVIEW_SIZE = 256
+
+
+def get_notification_notes_preview_size():
+    return getattr(settings, 'NOTIFICATION_NOTES_PREVIEW_SIZE',
+                   NOTIFICATION_NOTES_PREVIEW_SIZE)
+
 
+def _field_selection_supported():
+    # Older versions of Adjutant return full documents from list endpoints,
+    # so we only ask for a projection when the deployment says its Adjutant
+    # supports one. Set in the local_settings file:
+    # ADJUTANT_FIELD_SELECTION = True
+    return getattr(settings, 'ADJUTANT_FIELD_SELECTION', False)
 
-class AdjutantApiError(BaseException):
+
+# How long (in seconds) task counts are cached for.
+COUNT_CACHE_TIMEOUT = 30
+
+# How long (in seconds) task documents and pages of task lists are cached
+# for. Changes made through the dashboard update the cache straight away,
+# so this only bounds how long changes made elsewhere can go unseen.
+TASK_CACHE_TIMEOUT = 30
+
+# How long (in seconds) the documents listed on a page of notifications
+# are kept for, so clicking through to one of them doesn't fetch it again.
+NOTIFICATION_CACHE_TIMEOUT = 30
+
+# How long (in seconds) the number of notifications matching a filter is
+# remembered for, to keep page requests within bounds.
+NOTIFICATION_TOTAL_TIMEOUT = 300
+
+# The filters the dashboard lists notifications with, which acknowledging
+# moves notifications between.
+UNACKNOWLEDGED_FILTERS = {'acknowledged': {'exact': False}}
+ACKNOWLEDGED_FILTERS = {'acknowledged': {'exact': True}}
+
+# When Adjutant doesn't report how many pages a list has, counts are worked
+# out from a single page of this size, and shown as '<limit>+' past that.
+COUNT_LIMIT = 100
+
+
+def _generation_key(request, name, project_id=None):
+    return 'adjutant_ui:%s:%s:generation' % (
+        name, project_id or request.user.tenant_id)
+
+
+def _scoped_cache_key(request, name, *parts, project_id=None):
+    """Builds a cache key for name, scoped to the current project.
+
+    Every key embeds the current generation of the scope, so everything
+    cached under name for the project can be dropped at once by calling
+    _invalidate_scope. Another project can be given as project_id.
+    """
+    generation = cache.get(_generation_key(request, name, project_id), 0)
+    return _format_scoped_key(name, project_id or request.user.tenant_id,
+                              generation, parts)
+
+
+def _scoped_cache_keys(request, name, project_ids, *parts):
+    """Builds the _scoped_cache_key of name for each of project_ids.
+
+    The generations of every project are read in one go. Returns a dict of
+    project id to key.
+    """
+    generation_keys = dict((project_id, _generation_key(
+        request, name, project_id)) for project_id in project_ids)
+    generations = cache.get_many(list(generation_keys.values()))
+    return dict((project_id, _format_scoped_key(
+        name, project_id, generations.get(generation_key, 0), parts))
+        for project_id, generation_key in generation_keys.items())
+
+
+def _format_scoped_key(name, project_id, generation, parts):
+    digest = hashlib.sha1(
+        json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()
+    return 'adjutant_ui:%s:%s:%s:%s' % (name, project_id, generation, digest)
+
+
+def _invalidate_scope(request, name, project_id=None):
+    key = _generation_key(request, name, project_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def _list_count(request, url, list_key, per_page_param, filters):
+    headers = {"Content-Type": "application/json",
+               'X-Auth-Token': request.user.token.id}
+    params = {'filters': json.dumps(filters), 'page': 1,
+              per_page_param: 1}
+    if _field_selection_supported():
+        params['fields'] = json.dumps(['uuid'])
+
+    response = get(request, url, params=params, headers=headers)
+    if response.status_code != 200:
+        raise exceptions.NotAvailable()
+    resp = response.json()
+    if 'pages' in resp:
+        # With one item per page, the number of pages is the item count.
+        return resp['pages'] if resp[list_key] else 0
+
+    params[per_page_param] = COUNT_LIMIT
+    response = get(request, url, params=params, headers=headers)
+    if response.status_code != 200:
+        raise exceptions.NotAvailable()
+    resp = response.json()
+    count = len(resp[list_key])
+    if resp['has_more']:
+        return '%s+' % count
+    return count
+
+
+class AdjutantApiError(Exception):
     pass
 
 
@@ -218,44 +431,215 @@ def user_invite(request, user):
     headers = {'Content-Type': 'application/json',
                'X-Auth-Token': request.user.token.id}
     user['project_id'] = request.user.tenant_id
-    return post(request, 'openstack/users',
-                headers=headers, data=json.dumps(user))
+    response = post(request, 'openstack/users',
+                    headers=headers, data=json.dumps(user))
+    _users_changed(request)
+    return response
 
 
-def user_list(request):
+# How long (in seconds) the users of a project, and each of them, are
+# cached for. Changes made through the dashboard drop them straight away,
+# so this only bounds how long changes made elsewhere can go unseen.
+USER_CACHE_TIMEOUT = 60
+
+
+def _user_cache_key(request, user_id):
+    return 'adjutant_ui:user:%s:%s' % (request.user.tenant_id, user_id)
+
+
+def _users_changed(request, user_id=None):
+    """Drops the cached users of the project after a change to them."""
+    _invalidate_scope(request, 'user_list')
+    _invalidate_scope(request, 'user_directory')
+    if user_id is not None:
+        cache.delete(_user_cache_key(request, user_id))
+
+
+def _user_obj(user):
+    return USER(
+        id=user['id'],
+        name=user['name'],
+        email=user['email'],
+        roles=user['roles'],
+        status=user['status'],
+        cohort=user['cohort']
+    )
+
+
+def _project_user_list(request, token_id):
+    # Adjutant lists the users of the project the token is scoped to.
     users = []
     try:
         headers = {'Content-Type': 'application/json',
-                   'X-Auth-Token': request.user.token.id}
+                   'X-Auth-Token': token_id}
         resp = json.loads(get(request, 'openstack/users',
                               headers=headers).content)
 
         for user in resp['users']:
-            users.append(
-                USER(
-                    id=user['id'],
-                    name=user['name'],
-                    email=user['email'],
-                    roles=user['roles'],
-                    status=user['status'],
-                    cohort=user['cohort']
-                )
-            )
+            users.append(_user_obj(user))
     except Exception as e:
         LOG.error(e)
         raise
     return users
 
 
-def user_get(request, user_id):
+def user_list(request):
+    cache_key = _scoped_cache_key(request, 'user_list')
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return [USER(*user) for user in cached]
+
+    users = _project_user_list(request, request.user.token.id)
+    cache.set(cache_key, [tuple(user) for user in users], USER_CACHE_TIMEOUT)
+    return users
+
+
+# How long (in seconds) the users of each project are kept for in the
+# cross-project user directory. Changes made through the dashboard drop
+# them straight away.
+USER_DIRECTORY_CACHE_TIMEOUT = 600
+
+
+def user_directory_cached_get(request, project_ids):
+    """Gets the cached users of each of project_ids for the directory.
+
+    Returns a dict of project id to a list of USER, leaving out projects
+    that aren't cached.
+    """
+    keys = dict((key, project_id) for project_id, key in
+                _scoped_cache_keys(request, 'user_directory',
+                                   project_ids).items())
+    return dict((keys[key], [USER(*user) for user in users])
+                for key, users in cache.get_many(list(keys)).items())
+
+
+def user_directory_project_get(request, project_id, token_id):
+    """Lists the users of project_id with a token scoped to it.
+
+    The users are cached for the directory.
+    """
+    users = _project_user_list(request, token_id)
+    cache.set(_scoped_cache_key(request, 'user_directory',
+                                project_id=project_id),
+              [tuple(user) for user in users], USER_DIRECTORY_CACHE_TIMEOUT)
+    return users
+
+
+def user_directory_refresh(request, project_id):
+    """Drops the cached users of project_id from the directory."""
+    _invalidate_scope(request, 'user_directory', project_id=project_id)
+
+
+# How each search field is matched when Adjutant does the searching.
+USER_SEARCH_LOOKUPS = {
+    'name': 'icontains',
+    'email': 'icontains',
+    'role': 'contains',
+    'cohort': 'exact',
+}
+
+
+def _user_search_supported():
+    # Older versions of Adjutant return every user of the project at once,
+    # so we only ask it to page and search them when the deployment says
+    # its Adjutant can. Set in the local_settings file:
+    # ADJUTANT_USER_SEARCH = True
+    return getattr(settings, 'ADJUTANT_USER_SEARCH', False)
+
+
+def _user_index_get(request):
+    """Gets the users of the project, along with what to search them by.
+
+    Returns a list of (USER, name, email, cohort) tuples, with the search
+    fields lowercased. The index is cached for the project, so paging and
+    searching don't list the users again.
+    """
+    cache_key = _scoped_cache_key(request, 'user_list', 'index')
+    index = cache.get(cache_key)
+    if index is None:
+        index = [(tuple(user), user.name.lower(), user.email.lower(),
+                  user.cohort.lower())
+                 for user in user_list(request)]
+        cache.set(cache_key, index, USER_CACHE_TIMEOUT)
+    return [(USER(*user), name, email, cohort)
+            for user, name, email, cohort in index]
+
+
+def _user_search(index, search_field, search):
+    search = search.lower()
+    if search_field == 'name':
+        return [entry[0] for entry in index if search in entry[1]]
+    if search_field == 'email':
+        return [entry[0] for entry in index if search in entry[2]]
+    if search_field == 'cohort':
+        return [entry[0] for entry in index if search == entry[3]]
+    if search_field == 'role':
+        # Match on the names roles are shown with, as well as their own.
+        roles = set(role for entry in index for role in entry[0].roles)
+        roles = set(role for role in roles
+                    if search in role.lower() or
+                    search in str(get_role_text(role)).lower())
+        return [entry[0] for entry in index if roles & set(entry[0].roles)]
+    return [entry[0] for entry in index]
+
+
+def user_list_page(request, search_field=None, search=None, page=1,
+                   users_per_page=None):
+    """Lists a page of the users of the project.
+
+    Users can be searched by name, email, role or cohort, given as
+    search_field. Returns the users along with whether there are pages
+    before and after this one.
+    """
+    users_per_page = users_per_page or utils.get_page_size(request)
+    page = max(int(page), 1)
+    if not search:
+        search_field = None
+
+    if _user_search_supported():
+        headers = {'Content-Type': 'application/json',
+                   'X-Auth-Token': request.user.token.id}
+        params = {'page': page, 'users_per_page': users_per_page}
+        if search_field in USER_SEARCH_LOOKUPS:
+            params['filters'] = json.dumps(
+                {search_field: {USER_SEARCH_LOOKUPS[search_field]: search}})
+        resp = get(request, 'openstack/users', headers=headers,
+                   params=params).json()
+        return ([_user_obj(user) for user in resp['users']],
+                resp['has_prev'], resp['has_more'])
+
+    users = _user_index_get(request)
+    if search_field:
+        users = _user_search(users, search_field, search)
+    else:
+        users = [entry[0] for entry in users]
+    start = (page - 1) * users_per_page
+    return (users[start:start + users_per_page], page > 1,
+            len(users) > start + users_per_page)
+
+
+def user_get(request, user_id, cached=True):
+    """Gets a user of the current project.
+
+    Unless cached is False, a copy cached from an earlier call may be
+    returned. Either way, the user fetched is cached for later calls.
+    """
+    cache_key = _user_cache_key(request, user_id)
+    if cached:
+        user = cache.get(cache_key)
+        if user is not None:
+            return user
     try:
         headers = {'X-Auth-Token': request.user.token.id}
-        resp = get(request, 'openstack/users/%s' % user_id,
-                   headers=headers).content
-        return json.loads(resp)
+        response = get(request, 'openstack/users/%s' % user_id,
+                       headers=headers)
+        user = json.loads(response.content)
     except Exception as e:
         LOG.error(e)
         raise
+    if response.status_code == 200:
+        cache.set(cache_key, user, USER_CACHE_TIMEOUT)
+    return user
 
 
 def user_roles_update(request, user):
@@ -264,9 +648,11 @@ def user_roles_update(request, user):
                    'X-Auth-Token': request.user.token.id}
         user['project_id'] = request.user.tenant_id
         user['roles'] = user.roles
-        return put(request, 'openstack/users/%s/roles' % user['id'],
-                   headers=headers,
-                   data=json.dumps(user))
+        response = put(request, 'openstack/users/%s/roles' % user['id'],
+                       headers=headers,
+                       data=json.dumps(user))
+        _users_changed(request, user['id'])
+        return response
     except Exception as e:
         LOG.error(e)
         raise
@@ -279,9 +665,11 @@ def user_roles_add(request, user_id, roles):
         params = {}
         params['project_id'] = request.user.tenant_id
         params['roles'] = roles
-        return put(request, 'openstack/users/%s/roles' % user_id,
-                   headers=headers,
-                   data=json.dumps(params))
+        response = put(request, 'openstack/users/%s/roles' % user_id,
+                       headers=headers,
+                       data=json.dumps(params))
+        _users_changed(request, user_id)
+        return response
     except Exception as e:
         LOG.error(e)
         raise
@@ -294,9 +682,11 @@ def user_roles_remove(request, user_id, roles):
         params = {}
         params['project_id'] = request.user.tenant_id
         params['roles'] = roles
-        return delete(request, 'openstack/users/%s/roles' % user_id,
-                      headers=headers,
-                      data=json.dumps(params))
+        response = delete(request, 'openstack/users/%s/roles' % user_id,
+                          headers=headers,
+                          data=json.dumps(params))
+        _users_changed(request, user_id)
+        return response
     except Exception as e:
         LOG.error(e)
         raise
@@ -307,9 +697,11 @@ def user_revoke(request, user_id):
         headers = {'Content-Type': 'application/json',
                    'X-Auth-Token': request.user.token.id}
         data = dict()
-        return delete(request, 'openstack/users/%s' % user_id,
-                      headers=headers,
-                      data=json.dumps(data))
+        response = delete(request, 'openstack/users/%s' % user_id,
+                          headers=headers,
+                          data=json.dumps(data))
+        _users_changed(request, user_id)
+        return response
     except Exception as e:
         LOG.error(e)
         raise
@@ -323,16 +715,32 @@ def user_invitation_resend(request, user_id):
     data = {
         "task": user_id
     }
-    return post(request, 'tokens',
-                headers=headers,
-                data=json.dumps(data))
+    response = post(request, 'tokens',
+                    headers=headers,
+                    data=json.dumps(data))
+    _users_changed(request, user_id)
+    return response
+
+
+# How long (in seconds) the roles a user can manage are cached for.
+ROLE_CACHE_TIMEOUT = 300
 
 
 def valid_roles_get(request):
+    # Which roles can be managed depends on the roles of the user asking,
+    # so these are cached per user as well as per project.
+    cache_key = 'adjutant_ui:roles:%s:%s' % (request.user.tenant_id,
+                                             request.user.id)
+    roles = cache.get(cache_key)
+    if roles is not None:
+        return roles
     headers = {'Content-Type': 'application/json',
                'X-Auth-Token': request.user.token.id}
     role_data = get(request, 'openstack/roles', headers=headers)
-    return role_data.json()
+    roles = role_data.json()
+    if role_data.status_code == 200:
+        cache.set(cache_key, roles, ROLE_CACHE_TIMEOUT)
+    return roles
 
 
 def valid_role_names_get(request):
@@ -393,8 +801,15 @@ def signup_submit(request, data):
         raise
 
 
-def notification_list(request, filters={}, page=1):
-    notifs_per_page = utils.get_page_size(request)
+def notification_list(request, filters={}, page=1,
+                      notifications_per_page=None, preview=True):
+    """Lists a page of notifications matching filters.
+
+    The notifications carry a preview of their notes for listing in
+    tables, unless preview is False.
+    """
+    notifs_per_page = (notifications_per_page or
+                       utils.get_page_size(request))
     headers = {"Content-Type": "application/json",
                'X-Auth-Token': request.user.token.id}
 
@@ -403,16 +818,119 @@ def notification_list(request, filters={}, page=1):
                            'notifications_per_page': notifs_per_page})
     if not response.status_code == 200:
         if response.json() == {'error': 'Empty page'}:
+            cache.delete(_notification_total_key(request, filters))
             raise AdjutantApiError("Empty Page")
-        raise BaseException
-
+        raise exceptions.NotAvailable()
+
+    resp = response.json()
+    total_key = _notification_total_key(request, filters)
+    if not resp['has_more']:
+        # The last page tells us how many notifications match in total.
+        cache.set(total_key,
+                  (int(page) - 1) * notifs_per_page +
+                  len(resp['notifications']),
+                  NOTIFICATION_TOTAL_TIMEOUT)
+    else:
+        # More have arrived since the total was worked out, so pages past
+        # it mustn't be kept out.
+        last_page = notification_last_page(request, filters,
+                                           notifs_per_page)
+        if last_page is not None and int(page) >= last_page:
+            cache.delete(total_key)
+    preview_size = None
+    if preview:
+        preview_size = get_notification_notes_preview_size()
     notificationlist = []
-    for notification in response.json()['notifications']:
+    for notification in resp['notifications']:
         notificationlist.append(notification_obj_get(
-            request, notification=notification))
-    has_more = response.json()['has_more']
-    has_prev = response.json()['has_prev']
-    return notificationlist, has_prev, has_more
+            request, notification=notification, preview_size=preview_size))
+    if not preview:
+        return notificationlist, resp['has_prev'], resp['has_more']
+
+    # Hand the documents over to the detail view.
+    cache.set_many(
+        dict((_notification_cache_key(request, notification['uuid']),
+              notification)
+             for notification in resp['notifications']),
+        NOTIFICATION_CACHE_TIMEOUT)
+    return notificationlist, resp['has_prev'], resp['has_more']
+
+
+def _notification_total_key(request, filters):
+    return _scoped_cache_key(request, 'notification_total', filters)
+
+
+def notification_count(request, filters={}):
+    """Counts the notifications matching filters.
+
+    Returns an int, or a string such as '100+' when the count could only
+    be worked out up to COUNT_LIMIT.
+    """
+    return _list_count(request, 'notifications', 'notifications',
+                       'notifications_per_page', filters)
+
+
+def notification_last_page(request, filters={}, notifications_per_page=None):
+    """Returns the last page of notifications matching filters.
+
+    This is worked out from the last time the final page was listed, and
+    kept up to date as notifications are acknowledged. Returns None if it
+    isn't known.
+    """
+    total = cache.get(_notification_total_key(request, filters))
+    if total is None:
+        return None
+    notifs_per_page = (notifications_per_page or
+                       utils.get_page_size(request))
+    return max(1, -(-total // notifs_per_page))
+
+
+def notification_tasks_get(request, notifications):
+    """Fills in the type and status of the task of each notification.
+
+    The tasks are looked up with a task list call per page of tasks,
+    rather than one call per notification. If that lookup fails the
+    notifications are returned as they are.
+    """
+    task_ids = sorted(set(n.task for n in notifications if n.task))
+    if not task_ids:
+        return notifications
+    # Each task list call only returns a page of tasks.
+    page_size = utils.get_page_size(request)
+    tasks = {}
+    try:
+        for i in range(0, len(task_ids), page_size):
+            page, _prev, _more = task_list(
+                request, filters={'uuid': {'in': task_ids[i:i + page_size]}})
+            tasks.update((task.id, task) for task in page)
+    except Exception:
+        return notifications
+
+    enriched = []
+    for notification in notifications:
+        task = tasks.get(notification.task)
+        if task:
+            notification = notification._replace(
+                task_type=task.task_type, task_status=task.status)
+        enriched.append(notification)
+    return enriched
+
+
+def notification_ids_get(request, filters={}, limit=1000):
+    """Gets the uuids of up to limit notifications matching filters."""
+    headers = {"Content-Type": "application/json",
+               'X-Auth-Token': request.user.token.id}
+    params = {'filters': json.dumps(filters), 'page': 1,
+              'notifications_per_page': limit}
+    if _field_selection_supported():
+        params['fields'] = json.dumps(['uuid'])
+
+    response = get(request, 'notifications', headers=headers, params=params)
+    if not response.status_code == 200:
+        if response.json() == {'error': 'Empty page'}:
+            return []
+        raise exceptions.NotAvailable()
+    return [n['uuid'] for n in response.json()['notifications']]
 
 
 def notification_get(request, uuid):
@@ -423,7 +941,21 @@ def notification_get(request, uuid):
     return response
 
 
-def notification_obj_get(request, notification_id=None, notification=None):
+def _notification_cache_key(request, notification_id):
+    return 'adjutant_ui:notification:%s:%s' % (request.user.tenant_id,
+                                               notification_id)
+
+
+def notification_obj_get(request, notification_id=None, notification=None,
+                         preview_size=None):
+    """Builds a NOTIFICATION from a notification document.
+
+    If preview_size is given, only that many characters of the notes are
+    kept, and notes_truncated says whether any were left out.
+    """
+    if not notification:
+        notification = cache.get(
+            _notification_cache_key(request, notification_id))
     if not notification:
         notification = notification_get(request, notification_id).json()
 
@@ -437,7 +969,10 @@ def notification_obj_get(request, notification_id=None, notification=None):
     if isinstance(notes, list) and len(notes) == 1:
         notes = notes[0]
 
-    if not isinstance(notes, str):
+    truncated = False
+    if preview_size is not None:
+        notes, truncated = json_preview(notes, preview_size, indent=None)
+    elif not isinstance(notes, str):
         notes = json.dumps(notes)
 
     return NOTIFICATION(uuid=notification['uuid'],
@@ -445,7 +980,122 @@ def notification_obj_get(request, notification_id=None, notification=None):
                         error=notification['error'],
                         created_on=notification['created_on'],
                         acknowledged=notification['acknowledged'],
-                        notes=notes)
+                        notes=notes,
+                        notes_truncated=truncated)
+
+
+# Notifications are grouped on this many characters of their notes, which
+# is normally enough to tell one error from another.
+NOTIFICATION_SIGNATURE_SIZE = 512
+
+# Grouping only looks at this many notifications, listed in pages of
+# NOTIFICATION_GROUP_PAGE_SIZE. Can be overriden in the local_settings file:
+# NOTIFICATION_GROUP_LIMIT = <number of notifications>
+NOTIFICATION_GROUP_LIMIT = 2000
+NOTIFICATION_GROUP_PAGE_SIZE = 200
+
+# The details that differ between otherwise identical errors, and what
+# they're replaced with in a signature.
+_SIGNATURE_PATTERNS = [
+    (re.compile(r'[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?'
+                r'[0-9a-f]{12}', re.IGNORECASE), '<uuid>'),
+    (re.compile(r'\b[0-9a-f]{16,}\b', re.IGNORECASE), '<hex>'),
+    (re.compile(r'\d+'), '<n>'),
+    (re.compile(r'\s+'), ' '),
+]
+
+
+def notification_signature(notification):
+    """Normalizes the notes of a notification document.
+
+    Ids, numbers and timestamps are masked, so repeats of the same error
+    end up with the same signature.
+    """
+    signature = notification_obj_get(
+        None, notification=notification,
+        preview_size=NOTIFICATION_SIGNATURE_SIZE).notes
+    for pattern, replacement in _SIGNATURE_PATTERNS:
+        signature = pattern.sub(replacement, signature)
+    return signature.strip()
+
+
+def notification_groups_get(request, filters={}):
+    """Groups the notifications matching filters by task and signature.
+
+    Notifications are listed a page at a time and folded into their group
+    as they arrive, so only one page of documents is held at once. Returns
+    a list of NOTIFICATION_GROUP, most recent first, and whether every
+    matching notification was looked at (grouping stops after
+    NOTIFICATION_GROUP_LIMIT).
+    """
+    cache_key = _scoped_cache_key(request, 'notification_groups', filters)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        groups, complete = cached
+        return [NOTIFICATION_GROUP(*group) for group in groups], complete
+
+    headers = {"Content-Type": "application/json",
+               'X-Auth-Token': request.user.token.id}
+    limit = getattr(settings, 'NOTIFICATION_GROUP_LIMIT',
+                    NOTIFICATION_GROUP_LIMIT)
+    groups = collections.OrderedDict()
+    seen = 0
+    page = 1
+    complete = True
+    while True:
+        response = get(request, 'notifications', headers=headers,
+                       params={'filters': json.dumps(filters), 'page': page,
+                               'notifications_per_page':
+                                   NOTIFICATION_GROUP_PAGE_SIZE})
+        if not response.status_code == 200:
+            if response.json() == {'error': 'Empty page'}:
+                break
+            raise exceptions.NotAvailable()
+        resp = response.json()
+
+        for notification in resp['notifications']:
+            key = (notification['task'], notification['error'],
+                   notification_signature(notification))
+            created_on = notification['created_on']
+            group = groups.get(key)
+            if group is None:
+                groups[key] = [created_on, created_on,
+                               [notification['uuid']]]
+            else:
+                group[0] = min(group[0], created_on)
+                group[1] = max(group[1], created_on)
+                group[2].append(notification['uuid'])
+
+        seen += len(resp['notifications'])
+        if not resp['has_more']:
+            break
+        if seen >= limit:
+            complete = False
+            break
+        page += 1
+
+    grouped = []
+    for (task, error, signature), (first, last, ids) in groups.items():
+        group_id = hashlib.sha1(json.dumps(
+            [task, error, signature]).encode('utf-8')).hexdigest()
+        grouped.append(NOTIFICATION_GROUP(
+            id=group_id, task=task, error=error, signature=signature,
+            count=len(ids), first_created_on=first, last_created_on=last,
+            notification_ids=ids))
+    grouped.sort(key=lambda group: group.last_created_on, reverse=True)
+
+    cache.set(cache_key, ([tuple(group) for group in grouped], complete),
+              NOTIFICATION_CACHE_TIMEOUT)
+    return grouped, complete
+
+
+# The most notifications acknowledged in a single request.
+NOTIFICATION_ACKNOWLEDGE_CHUNK = 500
+
+
+# Sent with the request once notifications have been acknowledged, for
+# anything counting them to catch up.
+notifications_acknowledged = Signal()
 
 
 def notifications_acknowlege(request, notification_id=None):
@@ -453,18 +1103,64 @@ def notifications_acknowlege(request, notification_id=None):
                'X-Auth-Token': request.user.token.id}
     # Takes either a single notification id or a list of them
     # and acknowleges all of them
+    notification_ids = notification_id
+    if not isinstance(notification_ids, list):
+        notification_ids = [notification_ids]
+    cache_keys = [_notification_cache_key(request, n)
+                  for n in notification_ids]
+    # Only notifications we know weren't acknowledged yet move between the
+    # totals. If any aren't known, we can't tell how many move.
+    documents = cache.get_many(cache_keys)
+    moved = None
+    if len(documents) == len(cache_keys):
+        moved = len([d for d in documents.values()
+                     if not d['acknowledged']])
+    cache.delete_many(cache_keys)
     if isinstance(notification_id, list):
         data = {'notifications': notification_id}
-        return post(request, 'notifications', data=json.dumps(data),
-                    headers=headers)
+        response = post(request, 'notifications', data=json.dumps(data),
+                        headers=headers)
     else:
         url = "notifications/%s/" % notification_id
-        return post(request, url, data=json.dumps({'acknowledged': True}),
-                    headers=headers)
+        response = post(request, url,
+                        data=json.dumps({'acknowledged': True}),
+                        headers=headers)
+    if response and response.status_code in [200, 202]:
+        _notification_totals_moved(request, moved)
+        _invalidate_scope(request, 'notification_groups')
+        notifications_acknowledged.send(sender=None, request=request)
+    return response
+
+
+def _notification_totals_moved(request, count):
+    # Acknowledged notifications move from the unacknowledged list to the
+    # acknowledged one, so those totals can be adjusted in place when we
+    # know how many moved. The totals for any other filter can't be, and
+    # are dropped.
+    totals = []
+    if count is not None:
+        totals = [
+            (filters, cache.get(_notification_total_key(request, filters)),
+             delta)
+            for filters, delta in [(UNACKNOWLEDGED_FILTERS, -count),
+                                   (ACKNOWLEDGED_FILTERS, count)]]
+    _invalidate_scope(request, 'notification_total')
+    for filters, total, delta in totals:
+        if total is not None:
+            cache.set(_notification_total_key(request, filters),
+                      max(0, total + delta), NOTIFICATION_TOTAL_TIMEOUT)
 
 
 def task_list(request, filters={}, page=1):
     tasks_per_page = utils.get_page_size(request)
+    field_selection = _field_selection_supported()
+    cache_key = _scoped_cache_key(request, 'task_list', filters, page,
+                                  tasks_per_page, field_selection)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        rows, prev, more = cached
+        return [TASK_ROW(*row) for row in rows], prev, more
+
     tasklist = []
     prev = more = False
     try:
@@ -475,17 +1171,50 @@ def task_list(request, filters={}, page=1):
             "page": page,
             "tasks_per_page": tasks_per_page
         }
+        if field_selection:
+            params['fields'] = json.dumps(TASK_LIST_FIELDS)
         resp = get(request, "tasks", params=params, data=json.dumps({}),
                    headers=headers).json()
         prev = resp['has_prev']
         more = resp['has_more']
-        for task in resp['tasks']:
-            tasklist.append(task_obj_get(request, task=task, page=page))
-        return tasklist, prev, more
+        # Without field selection the documents are trimmed down to rows
+        # straight after decoding, and only the rows outlive this call,
+        # besides the copies handed over to the detail view. These go into
+        # the same cache as documents fetched by task_document_get, so the
+        # task mutations keep them up to date too.
+        tasks = resp.pop('tasks')
+        for task in tasks:
+            tasklist.append(task_row_get(task, page=page))
+        if not field_selection:
+            cache.set_many(
+                dict((_task_cache_key(request, task['uuid']), task)
+                     for task in tasks),
+                TASK_CACHE_TIMEOUT)
+            cache.delete_many([_task_payloads_key(request, task['uuid'])
+                               for task in tasks])
     except Exception as e:
         LOG.error(e)
         raise
 
+    cache.set(cache_key, ([tuple(row) for row in tasklist], prev, more),
+              TASK_CACHE_TIMEOUT)
+    return tasklist, prev, more
+
+
+def task_count(request, filters={}):
+    """Counts the tasks matching filters, caching the result briefly.
+
+    Returns an int, or a string such as '100+' when the count could only
+    be worked out up to COUNT_LIMIT.
+    """
+    key = _scoped_cache_key(request, 'task_count', filters)
+    count = cache.get(key)
+    if count is None:
+        count = _list_count(request, 'tasks', 'tasks', 'tasks_per_page',
+                            filters)
+        cache.set(key, count, COUNT_CACHE_TIMEOUT)
+    return count
+
 
 def task_get(request, task_id):
     # Get a single task
@@ -496,27 +1225,127 @@ def task_get(request, task_id):
                headers=headers)
 
 
-def task_obj_get(request, task_id=None, task=None, page=0):
-    if not task:
-        task = task_get(request, task_id).json()
+def _task_cache_key(request, task_id):
+    return 'adjutant_ui:task:%s:%s' % (request.user.tenant_id, task_id)
+
+
+def _task_payloads_key(request, task_id):
+    return 'adjutant_ui:task_payload:%s:%s' % (request.user.tenant_id,
+                                               task_id)
+
+
+def task_document_get(request, task_id, cached=True):
+    """Gets the task document for task_id.
+
+    Unless cached is False, a copy cached from an earlier call or task
+    list may be returned. Either way, the document fetched is cached for
+    later calls.
+    """
+    cache_key = _task_cache_key(request, task_id)
+    task = cache.get(cache_key) if cached else None
+    if task is None:
+        response = task_get(request, task_id)
+        task = response.json()
+        if response.status_code == 200:
+            cache.set(cache_key, task, TASK_CACHE_TIMEOUT)
+        # Payloads are memoized per cached document, see task_payload_get.
+        cache.delete(_task_payloads_key(request, task_id))
+    return task
+
+
+def _task_changed(request, task_id, response, changes=None):
+    """Brings the cached state of a task up to date after a mutation.
+
+    Cached task lists and counts for the project are dropped. If the
+    response holds the new task document it replaces the cached one,
+    otherwise any changes known to have been made are patched into the
+    cached document. Failing both, the cached document is dropped so the
+    next read goes to Adjutant.
+    """
+    _invalidate_scope(request, 'task_list')
+    _invalidate_scope(request, 'task_count')
+    cache.delete(_task_payloads_key(request, task_id))
+
+    cache_key = _task_cache_key(request, task_id)
+    if response.status_code not in [200, 202]:
+        cache.delete(cache_key)
+        return
+
+    try:
+        body = response.json()
+    except ValueError:
+        body = None
+    if isinstance(body, dict):
+        task = body.get('task', body)
+        if (isinstance(task, dict) and task.get('uuid') == task_id and
+                'actions' in task):
+            cache.set(cache_key, task, TASK_CACHE_TIMEOUT)
+            return
+
+    task = cache.get(cache_key)
+    if changes and task is not None:
+        task.update(changes)
+        cache.set(cache_key, task, TASK_CACHE_TIMEOUT)
+    else:
+        cache.delete(cache_key)
+
+
+def task_payload_get(request, task_id, path):
+    """Gets the full pretty printed JSON of part of a task.
 
-    status = "Awaiting Approval"
+    path is the sequence of keys leading from the task document to the
+    value, e.g. ('actions', 0, 'data'). The document is read through the
+    same cache as the detail page, and the output is memoized alongside
+    it. Whenever the cached document is replaced or dropped so are its
+    payloads, so an updated task is never served stale.
+    """
+    task = task_document_get(request, task_id)
+    if task.get('uuid') != task_id:
+        raise exceptions.NotFound()
+
+    payloads_key = _task_payloads_key(request, task_id)
+    payloads = cache.get(payloads_key) or {}
+    path_key = json.dumps(path)
+    if path_key not in payloads:
+        value = task
+        for key in path:
+            value = value[key]
+        if isinstance(value, str):
+            payloads[path_key] = value
+        else:
+            payloads[path_key] = json.dumps(value, indent=4)
+        cache.set(payloads_key, payloads, TASK_PAYLOAD_CACHE_TIMEOUT)
+    return payloads[path_key]
+
+
+def _task_status(task):
     if task['cancelled']:
-        status = "Cancelled"
+        return "Cancelled"
     elif task['completed_on']:
-        status = "Completed"
+        return "Completed"
     elif task['approved_on']:
-        status = "Approved; Incomplete"
+        return "Approved; Incomplete"
+    return "Awaiting Approval"
+
+
+def _task_valid(task):
+    if 'actions' not in task:
+        # Projected documents come with validity already worked out.
+        return task['valid']
+    return False not in [action['valid'] for action in task['actions']]
+
+
+def task_obj_get(request, task_id=None, task=None, page=0):
+    if not task:
+        task = task_document_get(request, task_id)
 
-    valid = False not in [action['valid'] for
-                          action in task['actions']]
     return TASK(
         id=task['uuid'],
         task_type=task['task_type'],
-        valid=valid,
+        valid=_task_valid(task),
         request_by=task['keystone_user'].get('username', '-'),
         request_project=task['keystone_user'].get('project_name', '-'),
-        status=status,
+        status=_task_status(task),
         created_on=task['created_on'],
         approved_on=task['approved_on'],
         completed_on=task['completed_on'],
@@ -525,32 +1354,55 @@ def task_obj_get(request, task_id=None, task=None, page=0):
     )
 
 
+def task_row_get(task, page=0):
+    """Parses a task document into a slim TASK_ROW for list views."""
+    return TASK_ROW(
+        id=task['uuid'],
+        task_type=task['task_type'],
+        valid=_task_valid(task),
+        request_by=task['keystone_user'].get('username', '-'),
+        request_project=task['keystone_user'].get('project_name', '-'),
+        status=_task_status(task),
+        created_on=task['created_on'],
+        approved_on=task['approved_on'],
+        completed_on=task['completed_on'],
+        page=page
+    )
+
+
 def task_cancel(request, task_id):
     headers = {"Content-Type": "application/json",
                'X-Auth-Token': request.user.token.id}
 
-    return delete(request, "tasks/%s" % task_id,
-                  headers=headers)
+    response = delete(request, "tasks/%s" % task_id,
+                      headers=headers)
+    _task_changed(request, task_id, response, {'cancelled': True})
+    return response
 
 
 def task_approve(request, task_id):
     headers = {"Content-Type": "application/json",
                'X-Auth-Token': request.user.token.id}
 
-    return post(request, "tasks/%s" % task_id,
-                data=json.dumps({"approved": True}), headers=headers)
+    response = post(request, "tasks/%s" % task_id,
+                    data=json.dumps({"approved": True}), headers=headers)
+    _task_changed(request, task_id, response)
+    return response
 
 
 def task_update(request, task_id, new_data):
     headers = {"Content-Type": "application/json",
                'X-Auth-Token': request.user.token.id}
 
-    return put(request, "tasks/%s" % task_id,
-               data=new_data, headers=headers)
+    response = put(request, "tasks/%s" % task_id,
+                   data=new_data, headers=headers)
+    _task_changed(request, task_id, response)
+    return response
 
 
 def task_revalidate(request, task_id):
-    task = task_get(request, task_id=task_id).json()
+    # The action data is sent back as is, so it has to be current.
+    task = task_document_get(request, task_id, cached=False)
 
     data = {}
     for action_data in [action['data'] for action in task['actions']]:
@@ -560,19 +1412,20 @@ def task_revalidate(request, task_id):
 
 
 # Quota management functions
+def _quota_set(quotas):
+    return frozenset((service, resource)
+                     for service, resources in quotas.items()
+                     for resource in resources)
+
+
 def _is_quota_hidden(service, resource):
-    hidden_quotas = getattr(settings, 'HIDDEN_QUOTAS', None)
-    if hidden_quotas is None:
-        hidden_quotas = HIDDEN_QUOTAS
-    return service in hidden_quotas and resource in hidden_quotas[service]
+    return (service, resource) in _settings_lookup(
+        'HIDDEN_QUOTAS', HIDDEN_QUOTAS, _quota_set)
 
 
 def _is_quota_important(service, resource):
-    important_quotas = getattr(settings, 'IMPORTANT_QUOTAS', None)
-    if important_quotas is None:
-        important_quotas = IMPORTANT_QUOTAS
-    return (
-        service in important_quotas and resource in important_quotas[service])
+    return (service, resource) in _settings_lookup(
+        'IMPORTANT_QUOTAS', IMPORTANT_QUOTAS, _quota_set)
 
 
 @memoized.memoized_method
@@ -0,0 +1,223 @@
+# Copyright (c) 2016 Catalyst IT Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import copy
+import csv
+import logging
+import threading
+import weakref
+
+from django.conf import settings
+from django import http
+
+import futurist
+
+LOG = logging.getLogger(__name__)
+
+# The number of Adjutant calls a dashboard process makes at once on behalf
+# of batch operations, across all users. Can be overriden in the
+# local_settings file:
+# BATCH_ACTION_WORKERS = <number of threads>
+BATCH_ACTION_WORKERS = 10
+
+# The number of those calls any one user can have in flight at once, so a
+# single large batch can't starve everyone else. Can be overriden in the
+# local_settings file:
+# BATCH_ACTION_USER_CONCURRENCY = <number of calls>
+BATCH_ACTION_USER_CONCURRENCY = 5
+
+# The number of objects fetched per page when exporting.
+EXPORT_PAGE_SIZE = 200
+
+_executor = None
+_executor_lock = threading.Lock()
+_user_slots = weakref.WeakValueDictionary()
+_user_slots_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = futurist.ThreadPoolExecutor(
+                max_workers=getattr(settings, 'BATCH_ACTION_WORKERS',
+                                    BATCH_ACTION_WORKERS))
+        return _executor
+
+
+def _get_user_slots(request):
+    # Slots only live as long as the user has calls in flight.
+    with _user_slots_lock:
+        slots = _user_slots.get(request.user.id)
+        if slots is None:
+            slots = threading.BoundedSemaphore(
+                getattr(settings, 'BATCH_ACTION_USER_CONCURRENCY',
+                        BATCH_ACTION_USER_CONCURRENCY))
+            _user_slots[request.user.id] = slots
+        return slots
+
+
+def submit(request, func, *args, **kwargs):
+    """Calls func on the shared batch executor, returning its future.
+
+    Blocks until the user making the request has fewer than
+    BATCH_ACTION_USER_CONCURRENCY calls in flight. Blocking here rather
+    than in the workers means a user waiting on their own calls never
+    holds a thread other users could be using.
+    """
+    slots = _get_user_slots(request)
+
+    def _call():
+        try:
+            return func(*args, **kwargs)
+        finally:
+            slots.release()
+
+    slots.acquire()
+    try:
+        return _get_executor().submit(_call)
+    except Exception:
+        slots.release()
+        raise
+
+
+def run_parallel(request, func, items):
+    """Calls func on each of items using the shared batch executor.
+
+    Returns a list of (result, exception) pairs in the same order as
+    items, where exception is None if the call succeeded.
+    """
+    futures = [submit(request, func, item) for item in items]
+    outcomes = []
+    for future in futures:
+        try:
+            outcomes.append((future.result(), None))
+        except Exception as e:
+            outcomes.append((None, e))
+    return outcomes
+
+
+def paged_items(request, list_page, *args, **kwargs):
+    """Yields the items of every page listed by list_page.
+
+    list_page is called with page set to each page number in turn, plus
+    the given arguments, and returns the page's items along with whether
+    there are pages before and after it. The next page is fetched on the
+    shared batch executor while the items of the current one are handed
+    out, so only two pages are held at once. A page that fails to list
+    is logged and ends the items there.
+    """
+    page = 1
+    future = submit(request, list_page, *args, page=page, **kwargs)
+    while future is not None:
+        try:
+            items, _prev, more = future.result()
+        except Exception as e:
+            LOG.error('Listing page %s failed: %s', page, e)
+            return
+        future = None
+        if more:
+            page += 1
+            future = submit(request, list_page, *args, page=page, **kwargs)
+        for item in items:
+            yield item
+
+
+class _Echo(object):
+    """A file-like object that hands back whatever is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(header, rows):
+    """Yields header and each of rows as lines of CSV."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def export_response(lines, content_type, filename):
+    """Streams lines as a download called filename.
+
+    Once streaming starts it is too late to change the response, so lines
+    should stop short on errors rather than raise.
+    """
+    response = http.StreamingHttpResponse(lines, content_type=content_type)
+    response['Content-Disposition'] = 'attachment; filename="%s"' % filename
+    return response
+
+
+class BatchOutcomesMixin(object):
+    """Works out the outcomes of a whole BatchAction at once.
+
+    Mix into a BatchAction or DeleteAction ahead of the Horizon class. By
+    default the existing action or delete hook is called for every allowed
+    object on the shared batch executor. For APIs that can act on many
+    objects in one call, set bulk_outcomes to a function taking the
+    request and the allowed ids, and returning a dict of id to a
+    (result, exception) pair.
+
+    Horizon's BatchAction.handle then replays the outcomes, so messages,
+    update() and success_ids behave exactly as they would otherwise. The
+    replay goes through a copy of the action, so the action and its
+    hooks are never changed, and allowed() is only asked once per object.
+    """
+
+    bulk_outcomes = None
+
+    def _get_outcomes(self, request, obj_ids):
+        if not obj_ids:
+            return {}
+        if self.bulk_outcomes is not None:
+            return self.bulk_outcomes(request, obj_ids)
+        return dict(zip(
+            obj_ids,
+            run_parallel(request,
+                         lambda datum_id: self.action(request, datum_id),
+                         obj_ids)))
+
+    def handle(self, table, request, obj_ids):
+        # Action instances are shared by every table of a class, so the
+        # outcomes are replayed through a copy made for this call rather
+        # than by changing this one.
+        replay = copy.copy(self)
+
+        # Horizon's handle checks each object is allowed again, so the
+        # answers are kept from the check made here.
+        allowed = {}
+
+        def _allowed(request, datum):
+            key = None if datum is None else table.get_object_id(datum)
+            if key not in allowed:
+                allowed[key] = self._allowed(request, datum)
+            return allowed[key]
+        replay._allowed = _allowed
+
+        allowed_ids = [
+            datum_id for datum_id in obj_ids
+            if table._filter_action(replay, request,
+                                    table.get_object_by_id(datum_id))]
+        outcomes = self._get_outcomes(request, allowed_ids)
+
+        def _action(request, datum_id):
+            result, error = outcomes[datum_id]
+            if error is not None:
+                raise error
+            return result
+        replay.action = _action
+
+        return super(BatchOutcomesMixin, replay).handle(
+            table, request, obj_ids)
@@ -0,0 +1,161 @@
+# Copyright (c) 2016 Catalyst IT Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.dispatch import receiver
+
+from keystoneauth1.identity import v3
+from openstack_auth import utils as auth_utils
+
+from adjutant_ui.api import adjutant
+
+LOG = logging.getLogger(__name__)
+
+# How often (in seconds) the unacknowledged notification count is polled.
+# Can be overriden in the local_settings file:
+# NOTIFICATION_POLL_INTERVAL = <seconds>
+NOTIFICATION_POLL_INTERVAL = 15
+
+# The poller stops once nobody has asked for the count for this many
+# intervals.
+POLLER_IDLE_INTERVALS = 4
+
+COUNT_CACHE_KEY = 'adjutant_ui:unacknowledged_count'
+
+# The parts of a request the Adjutant API calls use, for the poller to make
+# them with its own credentials.
+SERVICE_TOKEN = collections.namedtuple('ServiceToken', ['id'])
+SERVICE_USER = collections.namedtuple(
+    'ServiceUser', ['token', 'tenant_id', 'service_catalog',
+                    'services_region'])
+SERVICE_REQUEST = collections.namedtuple('ServiceRequest', ['user'])
+
+
+def get_poll_interval():
+    return getattr(settings, 'NOTIFICATION_POLL_INTERVAL',
+                   NOTIFICATION_POLL_INTERVAL)
+
+
+class UnacknowledgedCountPoller(object):
+    """Polls the unacknowledged notification count for the whole process.
+
+    However many admins are watching the count, Adjutant only sees one
+    poll per interval from each dashboard process. The poller signs in
+    with its own credentials, from NOTIFICATION_POLLER_AUTH. It starts
+    when the count is first asked for, and stops once nobody has asked
+    for a while.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._session = None
+        self._last_asked = 0
+        self.count = None
+
+    @property
+    def enabled(self):
+        return bool(getattr(settings, 'NOTIFICATION_POLLER_AUTH', None))
+
+    def get_count(self):
+        """Returns the last count polled, or None if there isn't one yet."""
+        with self._lock:
+            self._last_asked = time.time()
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='adjutant-notification-poller',
+                    daemon=True)
+                self._thread.start()
+            return self.count
+
+    def refresh(self):
+        """Drops the last count and polls again straight away."""
+        with self._lock:
+            self.count = None
+        self._wake.set()
+
+    def _get_request(self):
+        if self._session is None:
+            self._session = auth_utils.get_session(
+                auth=v3.Password(**settings.NOTIFICATION_POLLER_AUTH))
+        # The session reauthenticates whenever its token is about to expire.
+        access = self._session.auth.get_access(self._session)
+        catalog = access.service_catalog.catalog
+        return SERVICE_REQUEST(user=SERVICE_USER(
+            token=SERVICE_TOKEN(id=access.auth_token),
+            tenant_id=access.project_id,
+            service_catalog=catalog,
+            services_region=auth_utils.default_services_region(catalog)))
+
+    def _run(self):
+        while True:
+            interval = get_poll_interval()
+            with self._lock:
+                idle = time.time() - self._last_asked
+                if idle > interval * POLLER_IDLE_INTERVALS:
+                    self._thread = None
+                    self.count = None
+                    return
+
+            try:
+                count = adjutant.notification_count(
+                    self._get_request(),
+                    filters=adjutant.UNACKNOWLEDGED_FILTERS)
+            except Exception as e:
+                LOG.warning('Unable to poll notification count: %s', e)
+            else:
+                with self._lock:
+                    self.count = count
+
+            self._wake.wait(interval)
+            self._wake.clear()
+
+
+poller = UnacknowledgedCountPoller()
+
+
+def unacknowledged_count(request):
+    """Returns the unacknowledged notification count, or None.
+
+    The count comes from the poller when it has credentials of its own.
+    Otherwise it is counted with the credentials of whoever asks, at most
+    once per interval, and shared through the cache.
+    """
+    if poller.enabled:
+        return poller.get_count()
+
+    count = cache.get(COUNT_CACHE_KEY)
+    if count is None:
+        try:
+            count = adjutant.notification_count(
+                request, filters=adjutant.UNACKNOWLEDGED_FILTERS)
+        except Exception as e:
+            LOG.warning('Unable to count notifications: %s', e)
+            return None
+        cache.set(COUNT_CACHE_KEY, count, get_poll_interval())
+    return count
+
+
+@receiver(adjutant.notifications_acknowledged)
+def _notifications_acknowledged(sender, **kwargs):
+    # Other processes' pollers catch up within an interval.
+    cache.delete(COUNT_CACHE_KEY)
+    poller.refresh()
@@ -0,0 +1,48 @@
+/* Keeps a count of unacknowledged notifications on the Admin
+ * Notifications nav entry, and on the Unacknowledged tab.
+ *
+ * Loaded on every dashboard page, but only asks for the count when the
+ * user can see the notifications panel, and not while the page is hidden.
+ * The count is served from the dashboard's cache, so asking doesn't reach
+ * Adjutant more than once per interval however many admins are watching.
+ */
+horizon.addInitFunction(function () {
+  'use strict';
+
+  var $navLink = $('a[href$="/management/notifications/"]').first();
+  if (!$navLink.length) {
+    return;
+  }
+
+  function showCount($link, count) {
+    var $badge = $link.find('.adjutant-unacknowledged-count');
+    if (!$badge.length) {
+      $badge = $('<span class="badge adjutant-unacknowledged-count">');
+      $link.append(' ', $badge);
+    }
+    $badge.text(count).toggle(count !== 0);
+  }
+
+  var interval = 15;
+
+  function poll() {
+    if (document.hidden) {
+      $(document).one('visibilitychange', poll);
+      return;
+    }
+    $.getJSON($navLink.attr('href') + 'unacknowledged/count/')
+      .done(function (data) {
+        if (data.count !== null) {
+          showCount($navLink, data.count);
+          showCount($('a[data-target="#notifications__unacknowledged"]'),
+                    data.count);
+        }
+        interval = data.interval;
+      })
+      .always(function () {
+        setTimeout(poll, interval * 1000);
+      });
+  }
+
+  poll();
+});
@@ -12,19 +12,54 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from django import shortcuts
 from django.urls import reverse
+from django.utils.http import urlencode
 from django.utils.translation import gettext_lazy as _
 from django.utils.translation import ngettext_lazy
 
 from horizon import exceptions
+from horizon import messages
 from horizon import tables
 
 from adjutant_ui.api import adjutant
+from adjutant_ui.content import actions
+from adjutant_ui.content import rendering
+from adjutant_ui.content.tasks import tables as task_tables
 
 
-class AcknowlegeNotifcation(tables.BatchAction):
+def acknowledge_notifications(request, notification_ids):
+    """Acknowledges notification_ids in as few requests as possible.
+
+    The ids are sent in chunks of NOTIFICATION_ACKNOWLEDGE_CHUNK, all at
+    once on the shared batch executor. Returns a dict of notification id
+    to a (result, exception) pair; every id in a failed chunk is reported
+    as failed.
+    """
+    size = adjutant.NOTIFICATION_ACKNOWLEDGE_CHUNK
+    chunks = [notification_ids[i:i + size]
+              for i in range(0, len(notification_ids), size)]
+
+    def _acknowledge(chunk):
+        result = adjutant.notifications_acknowlege(request, chunk)
+        if not result or result.status_code not in [200, 202]:
+            exception = exceptions.NotAvailable()
+            exception._safe_message = False
+            raise exception
+        return result
+
+    outcomes = {}
+    for chunk, outcome in zip(chunks, actions.run_parallel(
+            request, _acknowledge, chunks)):
+        for notification_id in chunk:
+            outcomes[notification_id] = outcome
+    return outcomes
+
+
+class AcknowlegeNotifcation(actions.BatchOutcomesMixin, tables.BatchAction):
     name = 'acknowlege'
     help_text = _("This will acknowlege all selected tasks.")
+    bulk_outcomes = staticmethod(acknowledge_notifications)
 
     @staticmethod
     def action_present(count):
@@ -55,9 +90,90 @@ class AcknowlegeNotifcation(tables.BatchAction):
         return True
 
 
-def get_task_link(datum):
-    return reverse("horizon:management:tasks:detail",
-                   args=(datum.task,))
+class AcknowledgeAllNotifications(tables.Action):
+    name = 'acknowledge_all'
+    verbose_name = _("Acknowledge All")
+    help_text = _("This will acknowledge every unacknowledged notification, "
+                  "not just those on this page.")
+    action_type = "danger"
+    requires_input = False
+    filters = adjutant.UNACKNOWLEDGED_FILTERS
+    # Stops a backend that won't acknowledge some notifications from
+    # keeping us here forever.
+    max_rounds = 100
+
+    def single(self, data_table, request, object_id):
+        acknowledged = 0
+        failed = False
+        for _round in range(self.max_rounds):
+            # Acknowledged notifications drop out of the filter, so the
+            # first page always holds the next lot.
+            try:
+                notification_ids = adjutant.notification_ids_get(
+                    request, filters=self.filters,
+                    limit=adjutant.NOTIFICATION_ACKNOWLEDGE_CHUNK * 4)
+            except Exception:
+                failed = True
+                break
+            if not notification_ids:
+                break
+            outcomes = acknowledge_notifications(request, notification_ids)
+            succeeded = [n for n, (result, error) in outcomes.items()
+                         if error is None]
+            acknowledged += len(succeeded)
+            if len(succeeded) < len(notification_ids):
+                failed = True
+                break
+
+        if acknowledged:
+            messages.success(request, ngettext_lazy(
+                u"Acknowleged %(count)d notification.",
+                u"Acknowleged %(count)d notifications.",
+                acknowledged) % {'count': acknowledged})
+        if failed:
+            messages.error(request,
+                           _('Unable to acknowlege all notifications.'))
+        return shortcuts.redirect(request.get_full_path())
+
+
+class ExportNotifications(tables.LinkAction):
+    name = 'export_csv'
+    verbose_name = _("Export CSV")
+    icon = "download"
+    export_format = 'csv'
+
+    def get_link_url(self, datum=None):
+        url = reverse('horizon:management:notifications:export')
+        # Export whichever notifications the table is showing.
+        return "%s?%s" % (url, urlencode({
+            'format': self.export_format,
+            'acknowledged': str(self.table.acknowledged).lower()}))
+
+
+class ExportNotificationsJSON(ExportNotifications):
+    name = 'export_ndjson'
+    verbose_name = _("Export JSON")
+    export_format = 'ndjson'
+
+
+def get_notification_query(datum):
+    # Passing the task along lets the detail page fetch it straight away.
+    return {'task': datum.task}
+
+
+def get_notes_preview(datum):
+    if datum.notes_truncated:
+        return "%s\u2026" % datum.notes
+    return datum.notes
+
+
+class NotesColumn(rendering.LinkColumn):
+
+    def get_link_url(self, datum):
+        # Only the start of long notes is listed, the rest is on the
+        # detail page.
+        if datum.notes_truncated:
+            return super(NotesColumn, self).get_link_url(datum)
 
 
 class ErrorRow(tables.Row):
@@ -70,21 +186,32 @@ class ErrorRow(tables.Row):
             self.classes.append('danger')
 
 
-class NotificationTable(tables.DataTable):
-    uuid = tables.Column('uuid', verbose_name=_('Notification ID'),
-                         link="horizon:management:notifications:detail")
-    task = tables.Column('task', verbose_name=_('Task ID'),
-                         link=get_task_link)
+class NotificationTable(rendering.FastRowsMixin, tables.DataTable):
+    uuid = rendering.LinkColumn(
+        'uuid', verbose_name=_('Notification ID'),
+        link="horizon:management:notifications:detail",
+        link_query=get_notification_query)
+    task = rendering.LinkColumn('task', verbose_name=_('Task ID'),
+                                link="horizon:management:tasks:detail",
+                                link_arg='task')
+    task_type = tables.Column('task_type', verbose_name=_('Task Type'),
+                              filters=[task_tables.TaskTypeDisplayFilter])
+    task_status = tables.Column('task_status',
+                                verbose_name=_('Task Status'))
     error = tables.Column('error', verbose_name=_('Error'))
     created_on = tables.Column('created_on',
                                verbose_name=_('Created On'))
-    notes = tables.Column('notes')
+    notes = NotesColumn(get_notes_preview, verbose_name=_('Notes'),
+                        link="horizon:management:notifications:detail",
+                        link_query=get_notification_query)
+    acknowledged = False
 
     class Meta(object):
         template = 'notifications/table_override.html'
         name = 'notification_table'
         verbose_name = _('Unacknowledged Notifications')
-        table_actions = (AcknowlegeNotifcation, )
+        table_actions = (AcknowlegeNotifcation, AcknowledgeAllNotifications,
+                         ExportNotifications, ExportNotificationsJSON)
         row_actions = (AcknowlegeNotifcation, )
         row_class = ErrorRow
         prev_pagination_param = pagination_param = 'task_page'
@@ -103,9 +230,100 @@ class NotificationTable(tables.DataTable):
 
 
 class AcknowlegedNotificationTable(NotificationTable):
+    acknowledged = True
 
     class Meta(object):
         name = 'acknowleged_table'
         verbose_name = _('Acknowleged Notifications')
         prev_pagination_param = pagination_param = 'acknowledged_page'
-        table_actions = ()
+        table_actions = (ExportNotifications, ExportNotificationsJSON)
+
+
+def acknowledge_groups(request, group_ids):
+    """Acknowledges every notification in the groups with group_ids.
+
+    Returns a dict of group id to a (result, exception) pair. A group is
+    only acknowledged if all of its notifications are.
+    """
+    groups, _complete = adjutant.notification_groups_get(
+        request, filters=adjutant.UNACKNOWLEDGED_FILTERS)
+    groups = dict((group.id, group) for group in groups)
+    notification_ids = []
+    for group_id in group_ids:
+        if group_id in groups:
+            notification_ids.extend(groups[group_id].notification_ids)
+    outcomes = acknowledge_notifications(request, notification_ids)
+
+    group_outcomes = {}
+    for group_id in group_ids:
+        group_outcomes[group_id] = (None, exceptions.NotAvailable())
+        if group_id not in groups:
+            continue
+        failures = [outcomes[n] for n in groups[group_id].notification_ids
+                    if outcomes[n][1] is not None]
+        group_outcomes[group_id] = failures[0] if failures else (
+            groups[group_id].count, None)
+    return group_outcomes
+
+
+class AcknowledgeNotificationGroup(actions.BatchOutcomesMixin,
+                                   tables.BatchAction):
+    name = 'acknowledge_group'
+    help_text = _("This will acknowledge every notification in the "
+                  "selected groups.")
+    bulk_outcomes = staticmethod(acknowledge_groups)
+
+    @staticmethod
+    def action_present(count):
+        return ngettext_lazy(
+            u"Acknowledge Group",
+            u"Acknowledge Groups",
+            count
+        )
+
+    @staticmethod
+    def action_past(count):
+        return ngettext_lazy(
+            u"Acknowledged Group",
+            u"Acknowledged Groups",
+            count
+        )
+
+
+class NotificationGroupTable(rendering.FastRowsMixin, tables.DataTable):
+    task = rendering.LinkColumn('task', verbose_name=_('Task ID'),
+                                link="horizon:management:tasks:detail",
+                                link_arg='task')
+    task_type = tables.Column('task_type', verbose_name=_('Task Type'),
+                              filters=[task_tables.TaskTypeDisplayFilter])
+    task_status = tables.Column('task_status',
+                                verbose_name=_('Task Status'))
+    error = tables.Column('error', verbose_name=_('Error'))
+    signature = tables.Column('signature', verbose_name=_('Notes'),
+                              truncate=200)
+    count = tables.Column('count', verbose_name=_('Notifications'))
+    first_created_on = tables.Column('first_created_on',
+                                     verbose_name=_('First Created On'))
+    last_created_on = tables.Column('last_created_on',
+                                    verbose_name=_('Last Created On'))
+
+    class Meta(object):
+        template = 'notifications/table_override.html'
+        name = 'notification_groups'
+        verbose_name = _('Grouped Notifications')
+        table_actions = (AcknowledgeNotificationGroup, )
+        row_actions = (AcknowledgeNotificationGroup, )
+        row_class = ErrorRow
+        prev_pagination_param = pagination_param = 'group_page'
+
+    def get_prev_marker(self):
+        return str(int(self.page) - 1) if self.data else ''
+
+    def get_marker(self):
+        return str(int(self.page) + 1) if self.data else ''
+
+    def get_object_display(self, obj):
+        return obj.signature
+
+    def get_object_id(self, obj):
+        return obj.id
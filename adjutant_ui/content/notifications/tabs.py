@@ -15,7 +15,9 @@
 from django.utils.translation import gettext_lazy as _
 
 from horizon import exceptions
+from horizon import messages
 from horizon import tabs
+from horizon.utils import functions as utils
 
 from adjutant_ui.api import adjutant
 from adjutant_ui.api.adjutant import AdjutantApiError
@@ -28,20 +30,44 @@ class UnacknowledgedNotificationsTab(tabs.TableTab):
     page_title = _("Unacknowledged Notifications")
     name = _('Unacknowledged')
     slug = 'unacknowledged'
-    filters = {'acknowledged': {'exact': False}}
+    filters = adjutant.UNACKNOWLEDGED_FILTERS
     _prev = False
     _more = False
     _page = 1
 
+    def _get_page(self):
+        try:
+            page = int(self.request.GET.get(
+                self.table_classes[0]._meta.pagination_param, 1))
+        except ValueError:
+            return 1
+        return max(page, 1)
+
+    def _list_page(self, page):
+        # Asking for a page past the end costs a round trip for nothing,
+        # so keep within the last known bounds. If more have arrived since
+        # then, listing the last known page drops those bounds, and the
+        # page asked for is listed after all.
+        last_page = adjutant.notification_last_page(
+            self.request, filters=self.filters)
+        self._page = page
+        if last_page and page > last_page:
+            self._page = last_page
+        notifications, self._prev, self._more = adjutant.notification_list(
+            self.request, filters=self.filters, page=self._page)
+        if self._page < page and self._more:
+            self._page = page
+            notifications, self._prev, self._more = \
+                adjutant.notification_list(
+                    self.request, filters=self.filters, page=self._page)
+        return notifications
+
     def get_notification_table_data(self):
         notifications = []
-        self._page = self.request.GET.get(
-            self.table_classes[0]._meta.pagination_param, 1)
         try:
-            notifications, self._prev, self._more = adjutant.notification_list(
-                self.request, filters=self.filters, page=self._page)
+            notifications = self._list_page(self._get_page())
         except AdjutantApiError as e:
-            if e.message != "Empty Page":
+            if str(e) != "Empty Page":
                 raise
             try:
                 self._page = 1
@@ -54,7 +80,7 @@ class UnacknowledgedNotificationsTab(tabs.TableTab):
                     self.request, _('Failed to list notifications.'))
         except Exception:
             exceptions.handle(self.request, _('Failed to list notifications.'))
-        return notifications
+        return adjutant.notification_tasks_get(self.request, notifications)
 
     def has_prev_data(self, table):
         table.page = self._page
@@ -70,23 +96,69 @@ class AcknowlededNotificationsTab(UnacknowledgedNotificationsTab):
     page_title = _("Acknowleged Notifications")
     name = _('Acknowleged')
     slug = 'acknowledged'
-    filters = {'acknowledged': {'exact': True}}
+    filters = adjutant.ACKNOWLEDGED_FILTERS
 
     def get_acknowleged_table_data(self):
-        notifications = []
-        self._page = self.request.GET.get(
-            self.table_classes[0]._meta.pagination_param, 1)
+        return super(AcknowlededNotificationsTab,
+                     self).get_notification_table_data()
+
+
+class NotificationGroupsTab(tabs.TableTab):
+    table_classes = (notification_tables.NotificationGroupTable,)
+    template_name = 'horizon/common/_detail_table.html'
+    page_title = _("Grouped Notifications")
+    name = _('Grouped')
+    slug = 'grouped'
+    filters = adjutant.UNACKNOWLEDGED_FILTERS
+    # Grouping lists many pages of notifications, so only do it when asked.
+    preload = False
+    _prev = False
+    _more = False
+    _page = 1
+
+    def _get_page(self):
         try:
-            notifications, self._prev, self._more = adjutant.notification_list(
-                self.request, filters=self.filters, page=self._page)
+            page = int(self.request.GET.get(
+                self.table_classes[0]._meta.pagination_param, 1))
+        except ValueError:
+            return 1
+        return max(page, 1)
+
+    def get_notification_groups_data(self):
+        try:
+            groups, complete = adjutant.notification_groups_get(
+                self.request, filters=self.filters)
         except Exception:
-            exceptions.handle(self.request, _('Failed to list notifications.'))
-        return notifications
+            exceptions.handle(self.request,
+                              _('Failed to group notifications.'))
+            return []
+        if not complete:
+            messages.warning(self.request, _(
+                'Only the most recent unacknowledged notifications have '
+                'been grouped.'))
+
+        page_size = utils.get_page_size(self.request)
+        last_page = max(1, -(-len(groups) // page_size))
+        self._page = min(self._get_page(), last_page)
+        start = (self._page - 1) * page_size
+        self._prev = self._page > 1
+        self._more = self._page < last_page
+        return adjutant.notification_tasks_get(
+            self.request, groups[start:start + page_size])
+
+    def has_prev_data(self, table):
+        table.page = self._page
+        return self._prev
+
+    def has_more_data(self, table):
+        table.page = self._page
+        return self._more
 
 
 class NotificationTabGroup(tabs.TabGroup):
     slug = "notifications"
-    tabs = (UnacknowledgedNotificationsTab, AcknowlededNotificationsTab, )
+    tabs = (UnacknowledgedNotificationsTab, AcknowlededNotificationsTab,
+            NotificationGroupsTab, )
     sticky = True
 
     def get_selected_tab(self):
@@ -20,6 +20,13 @@ from adjutant_ui.content.notifications import views
 
 urlpatterns = [
     re_path(r'^$', views.IndexView.as_view(), name='index'),
+    re_path(r'^export/$', views.NotificationExportView.as_view(),
+            name='export'),
+    re_path(r'^unacknowledged/count/$',
+            views.UnacknowledgedCountView.as_view(),
+            name='unacknowledged_count'),
     re_path(r'^(?P<notif_id>[^/]+)/$',
             views.NotificationDetailView.as_view(), name='detail'),
+    re_path(r'^(?P<notif_id>[^/]+)/task/(?P<task_id>[^/]+)/$',
+            views.NotificationTaskView.as_view(), name='task'),
 ]
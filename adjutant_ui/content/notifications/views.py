@@ -12,8 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from concurrent import futures
+import json
+import logging
+
+from django import http
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
+from django.views import generic
 
 from horizon import exceptions
 from horizon import tabs
@@ -22,9 +28,21 @@ from horizon import views
 from horizon.utils import memoized
 
 from adjutant_ui.api import adjutant
+from adjutant_ui.content import actions
+from adjutant_ui.content.notifications import poller
 from adjutant_ui.content.notifications import tables as notification_tables
 from adjutant_ui.content.notifications import tabs as notification_tab
 
+LOG = logging.getLogger(__name__)
+
+# How long (in seconds) the detail page waits on a notification's task
+# before rendering without it, and loading it once the page is up.
+NOTIFICATION_TASK_TIMEOUT = 2
+
+# How soon (in seconds) the count is asked for again while the poller
+# doesn't have one yet.
+COUNT_RETRY_INTERVAL = 2
+
 
 class IndexView(tabs.TabbedTableView):
     tab_group_class = notification_tab.NotificationTabGroup
@@ -33,6 +51,88 @@ class IndexView(tabs.TabbedTableView):
     page_title = _("Admin Notifications")
 
 
+class UnacknowledgedCountView(generic.View):
+    """Returns the unacknowledged notification count as JSON.
+
+    The notifications panel polls this. The response also says how long
+    to wait before asking again. The count is null when it isn't known.
+    """
+
+    def get(self, request):
+        count = poller.unacknowledged_count(request)
+        interval = poller.get_poll_interval()
+        if count is None and poller.poller.enabled:
+            # The poller has likely only just started, so ask again soon.
+            # This doesn't reach Adjutant.
+            interval = min(interval, COUNT_RETRY_INTERVAL)
+        return http.JsonResponse({'count': count, 'interval': interval})
+
+
+EXPORT_FIELDS = ['uuid', 'task', 'error', 'created_on', 'acknowledged',
+                 'notes']
+
+
+def _notification_page(request, **kwargs):
+    try:
+        return adjutant.notification_list(request, **kwargs)
+    except adjutant.AdjutantApiError:
+        # Nothing matches the filters.
+        return [], False, False
+
+
+class NotificationExportView(generic.View):
+    """Streams every notification matching the given filters.
+
+    Takes ``format`` (``csv`` or ``ndjson``), and optional ``acknowledged``
+    and ``error`` (``true`` or ``false``) query parameters. Rows are
+    written out a page at a time while the next page is fetched, so memory
+    use doesn't grow with the number of notifications.
+    """
+
+    formats = {
+        'csv': ('text/csv', 'csv'),
+        'ndjson': ('application/x-ndjson', 'ndjson'),
+    }
+
+    def get(self, request):
+        export_format = request.GET.get('format', 'csv')
+        if export_format not in self.formats:
+            return http.HttpResponseBadRequest()
+        filters = self._get_filters(request)
+        content_type, extension = self.formats[export_format]
+
+        if export_format == 'csv':
+            lines = actions.csv_lines(
+                EXPORT_FIELDS, self._csv_rows(request, filters))
+        else:
+            lines = self._ndjson_rows(request, filters)
+        return actions.export_response(
+            lines, content_type, 'notifications.%s' % extension)
+
+    def _get_filters(self, request):
+        filters = {}
+        for field in ['acknowledged', 'error']:
+            value = request.GET.get(field, '').lower()
+            if value in ['true', 'false']:
+                filters[field] = {'exact': value == 'true'}
+        return filters
+
+    def _notifications(self, request, filters):
+        return actions.paged_items(
+            request, _notification_page, request, filters=filters,
+            notifications_per_page=actions.EXPORT_PAGE_SIZE, preview=False)
+
+    def _csv_rows(self, request, filters):
+        for notification in self._notifications(request, filters):
+            yield [getattr(notification, field) for field in EXPORT_FIELDS]
+
+    def _ndjson_rows(self, request, filters):
+        for notification in self._notifications(request, filters):
+            yield json.dumps(dict(
+                (field, getattr(notification, field))
+                for field in EXPORT_FIELDS)) + '\n'
+
+
 class NotificationDetailView(views.HorizonTemplateView):
     redirect_url = "horizon:management:notifications:index"
     template_name = 'notifications/detail.html'
@@ -49,18 +149,50 @@ class NotificationDetailView(views.HorizonTemplateView):
         return context
 
     def _get_actions(self, notification):
-        table = notification_tables.NotificationTable(self.request)
-        return table.render_row_actions(notification)
+        return notification_tables.NotificationTable.render_actions_for(
+            self.request, notification)
 
     @memoized.memoized_method
     def get_data(self):
+        # The notification tables pass the task along in the link, so the
+        # task can be fetched alongside the notification rather than after.
+        task_id = self.request.GET.get('task')
         try:
+            if task_id:
+                task_future = actions.submit(
+                    self.request, adjutant.task_obj_get, self.request,
+                    task_id=task_id)
             notification = adjutant.notification_obj_get(
                 self.request, self.kwargs['notif_id'])
-            task = adjutant.task_obj_get(self.request,
-                                         task_id=notification.task)
+            if task_id != notification.task:
+                task_future = actions.submit(
+                    self.request, adjutant.task_obj_get, self.request,
+                    task_id=notification.task)
+            try:
+                task = task_future.result(timeout=NOTIFICATION_TASK_TIMEOUT)
+            except futures.TimeoutError:
+                task = None
             return notification, task
         except Exception:
             msg = _('Unable to retrieve notification.')
             url = reverse('horizon:management:notifications:index')
             exceptions.handle(self.request, msg, redirect=url)
+
+
+class NotificationTaskView(views.HorizonTemplateView):
+    """Renders the task section of a notification on its own.
+
+    Used to fill in the detail page when the task was too slow to fetch
+    while rendering it.
+    """
+    template_name = 'notifications/_task_detail.html'
+
+    def get_context_data(self, **kwargs):
+        context = super(NotificationTaskView, self).get_context_data(
+            **kwargs)
+        try:
+            context['task'] = adjutant.task_obj_get(
+                self.request, task_id=self.kwargs['task_id'])
+        except Exception:
+            exceptions.handle(self.request, _('Unable to retrieve task.'))
+        return context
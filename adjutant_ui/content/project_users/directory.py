@@ -0,0 +1,87 @@
+# Copyright (c) 2016 Catalyst IT Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+
+from openstack_auth import utils as auth_utils
+
+from openstack_dashboard.api import keystone
+
+from adjutant_ui.api import adjutant
+from adjutant_ui.content import actions
+
+DIRECTORY_ENTRY = collections.namedtuple('DirectoryEntry',
+                                         ['id', 'user_id', 'name', 'email',
+                                          'roles', 'cohort', 'status',
+                                          'project_id', 'project_name'])
+
+
+def directory_allowed(request):
+    return request.user.is_superuser
+
+
+def _scoped_token(request, project_id):
+    plugin = auth_utils.get_token_auth_plugin(
+        auth_url=request.user.endpoint,
+        token=request.user.unscoped_token,
+        project_id=project_id)
+    return plugin.get_token(auth_utils.get_session())
+
+
+def directory_get(request):
+    """Lists the users of every project the admin has a role in.
+
+    Adjutant only lists the users of the project a token is scoped to, so
+    projects are listed with a token scoped to each, several at a time on
+    the shared batch executor. The admin can't get a token for projects
+    they have no role in, so those aren't tried. Each project's users are
+    cached on their own, so only projects that have expired or changed are
+    listed again. Returns the entries, as DIRECTORY_ENTRY, and the names
+    of any projects that couldn't be listed.
+    """
+    projects, _more = keystone.tenant_list(request, user=request.user.id)
+    project_names = dict((project.id, project.name) for project in projects)
+    project_users = adjutant.user_directory_cached_get(request,
+                                                       project_names)
+
+    def _list(project_id):
+        return adjutant.user_directory_project_get(
+            request, project_id, _scoped_token(request, project_id))
+
+    missing = [p for p in project_names if p not in project_users]
+    failed = []
+    for project_id, (users, error) in zip(
+            missing, actions.run_parallel(request, _list, missing)):
+        if error is None:
+            project_users[project_id] = users
+        else:
+            failed.append(project_names[project_id])
+
+    entries = []
+    for project_id, users in project_users.items():
+        for user in users:
+            entries.append(DIRECTORY_ENTRY(
+                id='%s:%s' % (project_id, user.id), user_id=user.id,
+                name=user.name, email=user.email, roles=user.roles,
+                cohort=user.cohort, status=user.status,
+                project_id=project_id,
+                project_name=project_names[project_id]))
+    return entries, sorted(failed)
+
+
+def directory_search(entries, search_field, search):
+    search = search.lower()
+    if search_field == 'name':
+        return [e for e in entries if search in e.name.lower()]
+    return [e for e in entries if search in e.email.lower()]
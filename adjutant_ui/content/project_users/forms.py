@@ -12,15 +12,24 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import csv
+import io
+import json
+import re
+
 from django.conf import settings
+from django.core import validators
+from django.core.cache import cache
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
+from django.utils.translation import ngettext_lazy
 
 from horizon import exceptions
 from horizon import forms
 from horizon import messages
 
 from adjutant_ui.api import adjutant
+from adjutant_ui.content import actions
 
 
 def get_role_choices(request):
@@ -66,11 +75,162 @@ class InviteUserForm(forms.SelfHandlingForm):
             return False
 
 
+# The most users that can be invited at once.
+BULK_INVITE_LIMIT = 1000
+
+# Where the results of the last bulk invite are kept for the results page.
+BULK_INVITE_RESULTS_KEY = 'adjutant_ui_bulk_invite_results'
+
+# How long (in seconds) the results of bulk operations are kept for. They
+# can run to a thousand rows, so are kept in the cache rather than the
+# session, which may be a cookie.
+BULK_RESULTS_TIMEOUT = 3600
+
+
+def _results_cache_key(request, key):
+    return 'adjutant_ui:%s:%s:%s' % (key, request.user.id,
+                                     request.user.tenant_id)
+
+
+def set_results(request, key, results):
+    """Keeps the results of a bulk operation for the current user."""
+    cache.set(_results_cache_key(request, key), results,
+              BULK_RESULTS_TIMEOUT)
+
+
+def get_results(request, key):
+    """Gets the results of the user's last bulk operation, if any."""
+    return cache.get(_results_cache_key(request, key), [])
+
+
+def parse_invites(text, role_names, username_is_email=False):
+    """Parses and validates CSV lines of username, email and roles.
+
+    Roles are separated by spaces or semicolons. A header line, and the
+    username column when usernames are emails, are ignored. Returns a list
+    of (line number, invite) pairs and a list of error messages.
+    """
+    invites = []
+    errors = []
+    emails = set()
+    for line, row in enumerate(csv.reader(io.StringIO(text)), 1):
+        row = [cell.strip() for cell in row]
+        if not any(row) or (line == 1 and row[0].lower() == 'username'):
+            continue
+        row += [''] * (3 - len(row))
+        username, email, roles = row[:3]
+        roles = [r for r in re.split(r'[;\s]+', roles) if r]
+
+        try:
+            validators.validate_email(email)
+        except forms.ValidationError:
+            errors.append(_('Line %(line)d: "%(email)s" is not a valid '
+                            'email address.') % {'line': line,
+                                                 'email': email})
+            continue
+        if email.lower() in emails:
+            errors.append(_('Line %(line)d: %(email)s is listed more than '
+                            'once.') % {'line': line, 'email': email})
+            continue
+        emails.add(email.lower())
+        if not username_is_email and not username:
+            errors.append(_('Line %d: No username given.') % line)
+            continue
+        invalid_roles = [r for r in roles if r not in role_names]
+        if not roles or invalid_roles:
+            errors.append(_('Line %(line)d: Give one or more of the roles '
+                            '%(roles)s.') % {'line': line,
+                                             'roles': ', '.join(role_names)})
+            continue
+
+        invite = {'email': email, 'roles': roles}
+        if not username_is_email:
+            invite['username'] = username
+        invites.append((line, invite))
+    return invites, errors
+
+
+class BulkInviteUserForm(forms.SelfHandlingForm):
+    invite_file = forms.FileField(
+        label=_("CSV File"), required=False,
+        help_text=_("A CSV file with a username, email and roles on each "
+                    "line."))
+    invite_text = forms.CharField(
+        label=_("Users"), required=False,
+        widget=forms.Textarea(attrs={'rows': 8}),
+        help_text=_("Or paste the lines here."))
+
+    def __init__(self, *args, **kwargs):
+        super(BulkInviteUserForm, self).__init__(*args, **kwargs)
+        self.role_names = [r for r, _name in get_role_choices(self.request)]
+
+    def clean(self):
+        cleaned_data = super(BulkInviteUserForm, self).clean()
+        invite_file = cleaned_data.get('invite_file')
+        text = cleaned_data.get('invite_text') or ''
+        if invite_file:
+            try:
+                text = invite_file.read().decode('utf-8-sig')
+            except UnicodeDecodeError:
+                raise forms.ValidationError(
+                    _('The CSV file must be UTF-8 encoded.'))
+
+        invites, errors = parse_invites(
+            text, self.role_names,
+            getattr(settings, 'USERNAME_IS_EMAIL', False))
+        if errors:
+            raise forms.ValidationError(errors)
+        if not invites:
+            raise forms.ValidationError(_('No users to invite.'))
+        if len(invites) > BULK_INVITE_LIMIT:
+            raise forms.ValidationError(
+                _('At most %d users can be invited at once.') %
+                BULK_INVITE_LIMIT)
+        cleaned_data['invites'] = invites
+        return cleaned_data
+
+    def handle(self, request, data):
+        def _invite(invite):
+            response = adjutant.user_invite(request, dict(invite[1]))
+            if response.status_code != 202:
+                raise exceptions.NotAvailable()
+            return response
+
+        results = []
+        invited = 0
+        for (line, invite), (response, error) in zip(
+                data['invites'],
+                actions.run_parallel(request, _invite, data['invites'])):
+            results.append({
+                'line': line,
+                'username': invite.get('username', invite['email']),
+                'email': invite['email'],
+                'roles': invite['roles'],
+                'invited': error is None,
+            })
+            invited += error is None
+
+        set_results(request, BULK_INVITE_RESULTS_KEY, results)
+        if invited:
+            messages.success(request, _('Invited %(invited)d of %(total)d '
+                                        'users.') % {'invited': invited,
+                                                     'total': len(results)})
+        failed = len(results) - invited
+        if failed:
+            messages.error(request, ngettext_lazy(
+                u"Failed to invite %(count)d user.",
+                u"Failed to invite %(count)d users.",
+                failed) % {'count': failed})
+        return True
+
+
 class UpdateUserForm(forms.SelfHandlingForm):
     id = forms.Field()
     id.widget = forms.HiddenInput()
     name = forms.CharField()
     name.widget.attrs['readonly'] = True
+    # The roles the user had when the form was rendered, as a JSON list.
+    original_roles = forms.CharField(widget=forms.HiddenInput())
 
     roles = forms.MultipleChoiceField(
         label=_("Roles"),
@@ -84,50 +244,162 @@ class UpdateUserForm(forms.SelfHandlingForm):
         super(UpdateUserForm, self).__init__(*args, **kwargs)
         self.fields['roles'].choices = get_role_choices(self.request)
 
+    def clean_original_roles(self):
+        try:
+            return set(json.loads(self.cleaned_data['original_roles']))
+        except (TypeError, ValueError):
+            raise forms.ValidationError(_('Invalid role snapshot.'))
+
     def handle(self, request, data):
-        # Get the before and after role lists, make two lists:
-        # roles_added and roles_removed.
-        # Submit each list to the api (add first?)
+        user_id = data['id']
+        # The diff is worked out against the roles the form was rendered
+        # with, and only the roles offered on the form can be changed.
+        managable_roles = set(r for r, _name in self.fields['roles'].choices)
+        original_roles = data['original_roles'] & managable_roles
+        desired_roles = set(data['roles'])
+        roles_added = list(desired_roles - original_roles)
+        roles_removed = list(original_roles - desired_roles)
+
         try:
-            user_id = data['id']
-            current_user = adjutant.user_get(request, user_id)
-            current_roles = set(current_user['roles'])
-            managable_roles = set(
-                adjutant.valid_role_names_get(request))
-            current_managable_roles = current_roles & managable_roles
-            desired_roles = set(data['roles'])
-            roles_added = list(desired_roles - current_managable_roles)
-            roles_removed = list(current_managable_roles - desired_roles)
-
-            # Remove roles from user
-            remove_status = 202
-            if len(roles_removed) > 0:
-                remove_response = adjutant.user_roles_remove(
-                    request,
-                    user_id,
-                    roles_removed)
-                remove_status = remove_response.status_code
-            if remove_status != 202:
-                messages.error(request, _('Failed to remove roles from user.'))
+            current_user = adjutant.user_get(request, user_id,
+                                             cached=False)
+            if set(current_user['roles']) != data['original_roles']:
+                messages.error(request, _(
+                    'The roles of this user have been changed since the '
+                    'form was opened. Please review them and try again.'))
                 return False
 
-            # Add new roles
-            added_status = 202
-            if len(roles_added) > 0:
-                added_response = adjutant.user_roles_add(
-                    request,
-                    user_id,
+            # Removing and adding don't depend on each other, so they are
+            # sent at the same time.
+            removed = added = None
+            if roles_removed:
+                removed = actions.submit(
+                    request, adjutant.user_roles_remove, request, user_id,
+                    roles_removed)
+            if roles_added:
+                added = actions.submit(
+                    request, adjutant.user_roles_add, request, user_id,
                     roles_added)
-                added_status = added_response.status_code
-            if added_status != 202:
-                messages.error(request, _('Failed to add roles to user.'))
-                return False
-
+            remove_status = removed.result().status_code if removed else 202
+            added_status = added.result().status_code if added else 202
         except Exception:
             msg = _('Failed to update user.')
             url = reverse('horizon:management:project_users:index')
             exceptions.handle(request, msg, redirect=url)
             return False
 
+        if remove_status != 202:
+            messages.error(request, _('Failed to remove roles from user.'))
+        if added_status != 202:
+            messages.error(request, _('Failed to add roles to user.'))
+        if remove_status != 202 or added_status != 202:
+            return False
+
         messages.success(request, _('Updated user successfully.'))
         return True
+
+
+# Where the results of the last bulk role update are kept for the results
+# page.
+BULK_ROLES_RESULTS_KEY = 'adjutant_ui_bulk_roles_results'
+
+
+class UpdateUsersRolesForm(forms.SelfHandlingForm):
+    user_ids = forms.CharField(widget=forms.HiddenInput())
+    roles_add = forms.MultipleChoiceField(
+        label=_("Add Roles"),
+        required=False,
+        widget=forms.CheckboxSelectMultiple(),
+        help_text=_("Roles to grant to every selected user."))
+    roles_remove = forms.MultipleChoiceField(
+        label=_("Remove Roles"),
+        required=False,
+        widget=forms.CheckboxSelectMultiple(),
+        help_text=_("Roles to revoke from every selected user."))
+
+    def __init__(self, *args, **kwargs):
+        super(UpdateUsersRolesForm, self).__init__(*args, **kwargs)
+        role_choices = get_role_choices(self.request)
+        self.fields['roles_add'].choices = role_choices
+        self.fields['roles_remove'].choices = role_choices
+
+    def clean_user_ids(self):
+        return [u for u in self.cleaned_data['user_ids'].split(',') if u]
+
+    def clean(self):
+        cleaned_data = super(UpdateUsersRolesForm, self).clean()
+        roles_add = set(cleaned_data.get('roles_add') or [])
+        roles_remove = set(cleaned_data.get('roles_remove') or [])
+        if not roles_add and not roles_remove:
+            raise forms.ValidationError(
+                _('Select roles to add or remove.'))
+        if roles_add & roles_remove:
+            raise forms.ValidationError(
+                _('A role cannot be both added and removed.'))
+        return cleaned_data
+
+    def handle(self, request, data):
+        # The users are already listed for the table, so each diff is
+        # worked out from the roles they were shown with.
+        try:
+            users = dict((user.id, user)
+                         for user in adjutant.user_list(request))
+        except Exception:
+            msg = _('Failed to update users.')
+            url = reverse('horizon:management:project_users:index')
+            exceptions.handle(request, msg, redirect=url)
+            return False
+
+        roles_add = set(data['roles_add'])
+        roles_remove = set(data['roles_remove'])
+        results = []
+        calls = []
+        for user_id in data['user_ids']:
+            user = users.get(user_id)
+            if user is None or user.cohort != 'Member':
+                continue
+            result = {'id': user.id, 'name': user.name, 'email': user.email,
+                      'roles_added': sorted(roles_add - set(user.roles)),
+                      'roles_removed': sorted(roles_remove & set(user.roles)),
+                      'status': 'unchanged'}
+            results.append(result)
+            if not (set(user.roles) - roles_remove) | roles_add:
+                # Taking away every role would revoke the user, which is
+                # left to the revoke action.
+                result['status'] = 'skipped'
+                continue
+            if result['roles_added']:
+                calls.append((result, adjutant.user_roles_add,
+                              result['roles_added']))
+            if result['roles_removed']:
+                calls.append((result, adjutant.user_roles_remove,
+                              result['roles_removed']))
+
+        def _call(call):
+            result, func, roles = call
+            response = func(request, result['id'], roles)
+            if response.status_code != 202:
+                raise exceptions.NotAvailable()
+            return response
+
+        for (result, func, roles), (response, error) in zip(
+                calls, actions.run_parallel(request, _call, calls)):
+            if error is not None:
+                result['status'] = 'failed'
+            elif result['status'] != 'failed':
+                result['status'] = 'updated'
+
+        set_results(request, BULK_ROLES_RESULTS_KEY, results)
+        updated = len([r for r in results if r['status'] == 'updated'])
+        failed = len([r for r in results if r['status'] == 'failed'])
+        if updated:
+            messages.success(request, ngettext_lazy(
+                u"Updated the roles of %(count)d user.",
+                u"Updated the roles of %(count)d users.",
+                updated) % {'count': updated})
+        if failed:
+            messages.error(request, ngettext_lazy(
+                u"Failed to update the roles of %(count)d user.",
+                u"Failed to update the roles of %(count)d users.",
+                failed) % {'count': failed})
+        return True
@@ -12,15 +12,21 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from collections import defaultdict
-
+from django import shortcuts
+from django.template import defaultfilters as filters
+from django.urls import reverse
+from django.utils.http import urlencode
 from django.utils.translation import gettext_lazy as _
 from django.utils.translation import ngettext_lazy
 
+from horizon import conf
 from horizon import exceptions
 from horizon import tables
 
 from adjutant_ui.api import adjutant
+from adjutant_ui.content import actions
+from adjutant_ui.content import rendering
+from adjutant_ui.content.project_users import directory
 
 
 class InviteUser(tables.LinkAction):
@@ -39,7 +45,47 @@ class InviteUser(tables.LinkAction):
         )
 
 
-class ResendInvitation(tables.BatchAction):
+class UpdateUsersRoles(tables.Action):
+    name = "update_roles"
+    verbose_name = _("Update Roles")
+    icon = "pencil"
+    help_text = _("Add or remove roles for all the selected users.")
+
+    def allowed(self, request, user=None):
+        return user is None or user.cohort == 'Member'
+
+    def handle(self, data_table, request, object_ids):
+        url = reverse('horizon:management:project_users:update_roles')
+        return shortcuts.redirect(
+            "%s?%s" % (url, urlencode({'user_ids': ','.join(object_ids)})))
+
+
+class BulkInviteUsers(tables.LinkAction):
+    name = "bulk_invite"
+    verbose_name = _("Invite Users")
+    url = "horizon:management:project_users:bulk_invite"
+    classes = ("ajax-modal",)
+    icon = "upload"
+
+
+class ExportUsers(tables.LinkAction):
+    name = "export"
+    verbose_name = _("Export CSV")
+    url = "horizon:management:project_users:export"
+    icon = "download"
+
+
+class UserDirectoryLink(tables.LinkAction):
+    name = "directory"
+    verbose_name = _("All Projects")
+    url = "horizon:management:project_users:directory"
+    icon = "search"
+
+    def allowed(self, request, datum=None):
+        return directory.directory_allowed(request)
+
+
+class ResendInvitation(actions.BatchOutcomesMixin, tables.BatchAction):
     name = "resend"
 
     @staticmethod
@@ -79,7 +125,7 @@ class UpdateUser(tables.LinkAction):
         return user.cohort == 'Member'
 
 
-class RevokeUser(tables.DeleteAction):
+class RevokeUser(actions.BatchOutcomesMixin, tables.DeleteAction):
     help_text = _("This will remove the selected user(s) from the current "
                   "project.")
 
@@ -120,37 +166,32 @@ class RevokeUser(tables.DeleteAction):
 
 
 class UpdateUserRow(tables.Row):
-    ajax = True
+    # Invited users are refreshed until they accept, but all together
+    # through the batch row view rather than by polling each row.
+    ajax = False
 
     def get_data(self, request, user_id):
-        user = adjutant.user_get(request, user_id)
-        return user
+        for user in adjutant.user_list(request):
+            if user.id == user_id:
+                return user
+        raise exceptions.NotFound()
 
     def load_cells(self, user=None):
         super(UpdateUserRow, self).load_cells(user)
-        user = self.datum
-        self.classes.append('category-' + user.cohort)
-
-
-class CohortFilter(tables.FixedFilterAction):
-    def get_fixed_buttons(self):
-        def make_dict(text, value, icon):
-            return dict(text=text, value=value, icon=icon)
+        if self.datum.cohort == 'Invited':
+            self.classes.append('batch-update')
+            self.attrs['data-update-interval'] = (
+                conf.HORIZON_CONFIG['ajax_poll_interval'])
 
-        buttons = []
-        buttons.append(make_dict(_('Project Users'),
-                                 'Member',
-                                 'fa-user-md'))
-        buttons.append(make_dict(_('Invited Users'),
-                                 'Invited',
-                                 'fa-user'))
-        return buttons
 
-    def categorize(self, table, users):
-        categorized_users = defaultdict(list)
-        for u in users:
-            categorized_users[u.cohort].append(u)
-        return categorized_users
+class UserFilter(tables.FilterAction):
+    # Projects can have thousands of users, so searches are done across
+    # every page rather than just the one being shown.
+    filter_type = "server"
+    filter_choices = (('name', _("Name ="), True),
+                      ('email', _("Email ="), True),
+                      ('role', _("Role ="), True),
+                      ('cohort', _("Member Type ="), True))
 
 
 def UserRoleDisplayFilter(role_list):
@@ -158,7 +199,7 @@ def UserRoleDisplayFilter(role_list):
     return ', '.join(roles)
 
 
-class UsersTable(tables.DataTable):
+class UsersTable(rendering.FastRowsMixin, tables.DataTable):
     uid = tables.Column('id', verbose_name=_('User ID'))
     name = tables.Column('name', verbose_name=_('Name'))
     email = tables.Column('email', verbose_name=_('Email'))
@@ -167,14 +208,103 @@ class UsersTable(tables.DataTable):
                           filters=[UserRoleDisplayFilter])
     status = tables.Column('status', verbose_name=_('Status'))
     cohort = tables.Column('cohort',
-                           verbose_name=_('Member Type'),
-                           hidden=True)
+                           verbose_name=_('Member Type'))
 
     class Meta(object):
         name = 'users'
         row_class = UpdateUserRow
         verbose_name = _('Users')
         columns = ('id', 'name', 'email', 'roles', 'status', 'cohort')
-        table_actions = (CohortFilter, InviteUser, RevokeUser)
+        table_actions = (UserFilter, InviteUser, BulkInviteUsers,
+                         UpdateUsersRoles, ExportUsers, UserDirectoryLink,
+                         RevokeUser)
         row_actions = (UpdateUser, ResendInvitation, RevokeUser)
         multi_select = True
+        prev_pagination_param = pagination_param = 'user_page'
+
+    def get_prev_marker(self):
+        return str(int(self.page) - 1) if self.data else ''
+
+    def get_marker(self):
+        return str(int(self.page) + 1) if self.data else ''
+
+
+class BulkInviteResultTable(tables.DataTable):
+    line = tables.Column('line', verbose_name=_('Line'))
+    username = tables.Column('username', verbose_name=_('Name'))
+    email = tables.Column('email', verbose_name=_('Email'))
+    roles = tables.Column('roles',
+                          verbose_name=_('Roles'),
+                          filters=[UserRoleDisplayFilter])
+    invited = tables.Column('invited', verbose_name=_('Invited'),
+                            filters=(filters.yesno, filters.capfirst))
+
+    class Meta(object):
+        name = 'bulk_invite_results'
+        verbose_name = _('Invitations')
+
+    def get_object_id(self, datum):
+        return datum['line']
+
+
+class BulkRolesResultTable(tables.DataTable):
+    name = tables.Column('name', verbose_name=_('Name'))
+    email = tables.Column('email', verbose_name=_('Email'))
+    roles_added = tables.Column('roles_added',
+                                verbose_name=_('Roles Added'),
+                                filters=[UserRoleDisplayFilter])
+    roles_removed = tables.Column('roles_removed',
+                                  verbose_name=_('Roles Removed'),
+                                  filters=[UserRoleDisplayFilter])
+    status = tables.Column('status', verbose_name=_('Result'),
+                           display_choices=(('unchanged', _('Unchanged')),
+                                            ('updated', _('Updated')),
+                                            ('skipped', _('Skipped, this '
+                                                          'would remove '
+                                                          'every role')),
+                                            ('failed', _('Failed'))))
+
+    class Meta(object):
+        name = 'bulk_roles_results'
+        verbose_name = _('Role Updates')
+
+    def get_object_id(self, datum):
+        return datum['id']
+
+
+class DirectoryFilter(tables.FilterAction):
+    filter_type = "server"
+    filter_choices = (('email', _("Email ="), True),
+                      ('name', _("Name ="), True))
+
+
+class RefreshDirectoryProjects(tables.Action):
+    name = "refresh"
+    verbose_name = _("Refresh Projects")
+    icon = "refresh"
+    help_text = _("List the users of the projects of the selected users "
+                  "again.")
+
+    def handle(self, data_table, request, object_ids):
+        for project_id in set(i.split(':', 1)[0] for i in object_ids):
+            adjutant.user_directory_refresh(request, project_id)
+        return shortcuts.redirect(request.get_full_path())
+
+
+class UserDirectoryTable(rendering.FastRowsMixin, tables.DataTable):
+    name = tables.Column('name', verbose_name=_('Name'))
+    email = tables.Column('email', verbose_name=_('Email'))
+    project_name = rendering.LinkColumn(
+        'project_name', verbose_name=_('Project'),
+        link='horizon:identity:projects:detail', link_arg='project_id')
+    roles = tables.Column('roles',
+                          verbose_name=_('Roles'),
+                          filters=[UserRoleDisplayFilter])
+    status = tables.Column('status', verbose_name=_('Status'))
+    cohort = tables.Column('cohort', verbose_name=_('Member Type'))
+
+    class Meta(object):
+        name = 'user_directory'
+        verbose_name = _('Users in All Projects')
+        table_actions = (DirectoryFilter, RefreshDirectoryProjects)
+        multi_select = True
@@ -19,6 +19,19 @@ from adjutant_ui.content.project_users import views
 
 urlpatterns = [
     re_path(r'^invite/$', views.InviteUserView.as_view(), name='invite'),
+    re_path(r'^invite/bulk/$', views.BulkInviteUserView.as_view(),
+            name='bulk_invite'),
+    re_path(r'^invite/bulk/results/$', views.BulkInviteResultsView.as_view(),
+            name='bulk_invite_results'),
+    re_path(r'^update_roles/$', views.UpdateUsersRolesView.as_view(),
+            name='update_roles'),
+    re_path(r'^update_roles/results/$',
+            views.UpdateUsersRolesResultsView.as_view(),
+            name='update_roles_results'),
+    re_path(r'^rows/$', views.UserRowsView.as_view(), name='rows'),
+    re_path(r'^export/$', views.UserExportView.as_view(), name='export'),
+    re_path(r'^directory/$', views.UserDirectoryView.as_view(),
+            name='directory'),
     re_path(r'^(?P<user_id>[^/]+)/update/$',
             views.UpdateUserView.as_view(),
             name='update'),
@@ -12,12 +12,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import json
+import logging
+
+from django import http
 from django.urls import reverse
 from django.urls import reverse_lazy
 from django.utils.translation import gettext_lazy as _
+from django.views import generic
 
 from horizon import exceptions
 from horizon import forms
+from horizon import messages
 from horizon import tables
 from horizon.utils import memoized
 
@@ -26,6 +32,10 @@ from adjutant_ui.content.project_users import tables as users_tables
 from adjutant_ui.content.project_users import forms as users_forms
 
 from adjutant_ui.api import adjutant
+from adjutant_ui.content import actions
+from adjutant_ui.content.project_users import directory
+
+LOG = logging.getLogger(__name__)
 
 
 class InviteUserView(forms.ModalFormView):
@@ -40,6 +50,55 @@ class InviteUserView(forms.ModalFormView):
     page_title = _("Invite User")
 
 
+class BulkInviteUserView(forms.ModalFormView):
+    form_class = users_forms.BulkInviteUserForm
+    form_id = "bulk_invite_user_form"
+    modal_header = _("Invite Users")
+    submit_label = _("Invite Users")
+    submit_url = reverse_lazy('horizon:management:project_users:bulk_invite')
+    template_name = 'management/project_users/bulk_invite.html'
+    context_object_name = 'project_users'
+    success_url = reverse_lazy(
+        "horizon:management:project_users:bulk_invite_results")
+    page_title = _("Invite Users")
+
+
+class BulkInviteResultsView(tables.DataTableView):
+    table_class = users_tables.BulkInviteResultTable
+    template_name = 'management/project_users/bulk_invite_results.html'
+    page_title = _("Invitations")
+
+    def get_data(self):
+        return users_forms.get_results(self.request,
+                                       users_forms.BULK_INVITE_RESULTS_KEY)
+
+
+class UpdateUsersRolesView(forms.ModalFormView):
+    form_class = users_forms.UpdateUsersRolesForm
+    form_id = "update_users_roles_form"
+    modal_header = _("Update Roles")
+    submit_label = _("Update Roles")
+    submit_url = reverse_lazy('horizon:management:project_users:update_roles')
+    template_name = 'management/project_users/update_roles.html'
+    context_object_name = 'project_users'
+    success_url = reverse_lazy(
+        "horizon:management:project_users:update_roles_results")
+    page_title = _("Update Roles")
+
+    def get_initial(self):
+        return {'user_ids': self.request.GET.get('user_ids', '')}
+
+
+class UpdateUsersRolesResultsView(tables.DataTableView):
+    table_class = users_tables.BulkRolesResultTable
+    template_name = 'management/project_users/update_roles_results.html'
+    page_title = _("Role Updates")
+
+    def get_data(self):
+        return users_forms.get_results(self.request,
+                                       users_forms.BULK_ROLES_RESULTS_KEY)
+
+
 class UpdateUserView(forms.ModalFormView):
     form_class = users_forms.UpdateUserForm
     form_id = "update_user_form"
@@ -73,6 +132,7 @@ class UpdateUserView(forms.ModalFormView):
         data = {'id': self.kwargs['user_id'],
                 'name': user['username'],
                 'roles': user['roles'],
+                'original_roles': json.dumps(sorted(user['roles'])),
                 }
         return data
 
@@ -81,10 +141,120 @@ class UsersView(tables.DataTableView):
     table_class = users_tables.UsersTable
     template_name = 'management/project_users/index.html'
     page_title = _("Project Users")
+    _prev = False
+    _more = False
 
     def get_data(self):
+        page = self.request.GET.get(
+            self.table_class._meta.pagination_param, 1)
+        try:
+            page = max(int(page), 1)
+        except ValueError:
+            page = 1
+        self.table.page = page
+
+        search_field, search = None, None
+        filters = self.get_filters()
+        if filters:
+            search_field, search = list(filters.items())[0]
+        try:
+            users, self._prev, self._more = adjutant.user_list_page(
+                self.request, search_field=search_field, search=search,
+                page=page)
+            return users
+        except Exception:
+            exceptions.handle(self.request, _('Failed to list users.'))
+            return []
+
+    def has_prev_data(self, table):
+        return self._prev
+
+    def has_more_data(self, table):
+        return self._more
+
+
+class UserRowsView(generic.View):
+    """Renders the rows of UsersTable for the given users as JSON.
+
+    Takes the user ids as repeated ``id`` query parameters, and returns a
+    mapping of each id to its rendered row, or to null if the user is no
+    longer in the project. All the rows come from a single user list.
+    """
+
+    def get(self, request):
+        try:
+            users = dict((user.id, user)
+                         for user in adjutant.user_list(request))
+        except Exception:
+            return http.JsonResponse({}, status=503)
+
+        table = users_tables.UsersTable(request)
+        rows = {}
+        for user_id in request.GET.getlist('id'):
+            user = users.get(user_id)
+            rows[user_id] = None
+            if user is not None:
+                rows[user_id] = table._meta.row_class(table, user).render()
+        return http.JsonResponse(rows)
+
+
+EXPORT_FIELDS = ['id', 'name', 'email', 'roles', 'role_names', 'status',
+                 'cohort']
+
+
+class UserExportView(generic.View):
+    """Streams the users of the project and their roles as CSV.
+
+    Rows are written a page of users at a time, while the next page is
+    fetched. When Adjutant pages users itself, memory use doesn't grow with
+    the size of the project.
+    """
+
+    def get(self, request):
+        return actions.export_response(
+            actions.csv_lines(EXPORT_FIELDS, self._rows(request)),
+            'text/csv', 'project_users.csv')
+
+    def _rows(self, request):
+        users = actions.paged_items(
+            request, adjutant.user_list_page, request,
+            users_per_page=actions.EXPORT_PAGE_SIZE)
+        for user in users:
+            yield [user.id, user.name, user.email, ' '.join(user.roles),
+                   ', '.join(str(adjutant.get_role_text(r))
+                             for r in user.roles),
+                   user.status, user.cohort]
+
+
+class UserDirectoryView(tables.DataTableView):
+    """Searches the users of every project, for cloud admins."""
+    table_class = users_tables.UserDirectoryTable
+    template_name = 'management/project_users/directory.html'
+    page_title = _("Users in All Projects")
+    _needs_filter_first = False
+
+    def dispatch(self, request, *args, **kwargs):
+        if not directory.directory_allowed(request):
+            raise exceptions.NotAuthorized()
+        return super(UserDirectoryView, self).dispatch(
+            request, *args, **kwargs)
+
+    def needs_filter_first(self, table):
+        return self._needs_filter_first
+
+    def get_data(self):
+        filters = self.get_filters()
+        if not filters:
+            # Listing every project is only worth it to find someone.
+            self._needs_filter_first = True
+            return []
+        search_field, search = list(filters.items())[0]
         try:
-            return adjutant.user_list(self.request)
+            entries, failed = directory.directory_get(self.request)
         except Exception:
             exceptions.handle(self.request, _('Failed to list users.'))
             return []
+        if failed:
+            messages.warning(self.request, _(
+                'Unable to list the users of: %s') % ', '.join(failed))
+        return directory.directory_search(entries, search_field, search)
@@ -25,6 +25,7 @@ from openstack_dashboard.dashboards.admin.defaults.tables import (
 )
 
 from adjutant_ui.api import adjutant
+from adjutant_ui.content import actions
 
 
 def to_caps(value):
@@ -56,7 +57,7 @@ class UpdateQuota(tables.LinkAction):
     icon = "edit"
 
 
-class CancelQuotaTask(tables.DeleteAction):
+class CancelQuotaTask(actions.BatchOutcomesMixin, tables.DeleteAction):
     help_text = _("This will cancel the selected quota update.")
 
     @staticmethod
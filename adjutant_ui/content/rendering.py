@@ -0,0 +1,191 @@
+# Copyright (c) 2016 Catalyst IT Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import copy
+import functools
+from urllib.parse import quote
+
+from django.urls import NoReverseMatch
+from django.urls import reverse
+from django.utils.http import RFC3986_SUBDELIMS
+from django.utils.http import urlencode
+
+from horizon import tables
+
+# Reversed in place of a row's id, then swapped for each row's own.
+_URL_PLACEHOLDER = 'rowurlplaceholder'
+
+# The names of batch actions are lazy translations, so can be shared by
+# every table and language rather than rebuilt for each row.
+_action_names = {}
+
+
+def _memoized_filter(filter_func):
+    values = {}
+
+    @functools.wraps(filter_func)
+    def memoized(data):
+        key = tuple(data) if isinstance(data, list) else data
+        try:
+            return values[key]
+        except KeyError:
+            pass
+        except TypeError:
+            return filter_func(data)
+        values[key] = filter_func(data)
+        return values[key]
+    return memoized
+
+
+class _SharedNamesMixin(object):
+    # For BatchActions using Horizon's update, which only works out their
+    # names.
+    def update(self, request, datum):
+        key = (type(self), self.current_present_action)
+        if key not in _action_names:
+            super(_SharedNamesMixin, self).update(request, datum)
+            _action_names[key] = (self.verbose_name,
+                                  self.verbose_name_plural)
+        self.verbose_name, self.verbose_name_plural = _action_names[key]
+
+
+class _RowUrlMixin(object):
+    # For LinkActions reversing their url with the row's id.
+    def get_link_url(self, datum=None):
+        if datum is None:
+            return super(_RowUrlMixin, self).get_link_url(datum)
+        try:
+            return self.table.get_row_url(self.url,
+                                          self.table.get_object_id(datum))
+        except NoReverseMatch:
+            return self.url
+
+
+_fast_action_classes = {}
+
+
+def _fast_action_class(action):
+    """Returns a subclass of the action's class with faster row hooks.
+
+    Only Horizon's own update and get_link_url are replaced, so actions
+    overriding them keep their own. Returns None if nothing is replaced.
+    """
+    action_class = type(action)
+    if action_class not in _fast_action_classes:
+        mixins = []
+        if (isinstance(action, tables.BatchAction) and
+                action_class.update is tables.BatchAction.update):
+            mixins.append(_SharedNamesMixin)
+        if (isinstance(action, tables.LinkAction) and
+                isinstance(action.url, str) and
+                action_class.get_link_url is tables.LinkAction.get_link_url):
+            mixins.append(_RowUrlMixin)
+        fast_class = None
+        if mixins:
+            fast_class = type(action_class)(
+                action_class.__name__, tuple(mixins) + (action_class,), {})
+        _fast_action_classes[action_class] = fast_class
+    return _fast_action_classes[action_class]
+
+
+class FastRowsMixin(object):
+    """DataTable mixin doing per row work once per table where it can.
+
+    Link urls are built from a prefix reversed once, column filters are
+    run once per distinct value, and batch action names are only worked
+    out once. Horizon renders the rows as usual: the table's row actions
+    are copies whose url and naming hooks use the above.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(FastRowsMixin, self).__init__(*args, **kwargs)
+        # Columns are copied for each table, so this doesn't leak between
+        # requests or languages.
+        for column in self.columns.values():
+            if column.filters:
+                column.filters = [_memoized_filter(f)
+                                  for f in column.filters]
+        self._init_row_actions()
+
+    def _init_row_actions(self):
+        self._url_prefixes = {}
+        # The actions are shared by every table of the class, so the ones
+        # given faster hooks are copied for this table.
+        self.base_actions = dict(self.base_actions)
+        for action in self._meta.row_actions:
+            base_action = self.base_actions[action.name]
+            fast_class = _fast_action_class(base_action)
+            if fast_class is None:
+                continue
+            fast_action = copy.copy(base_action)
+            fast_action.__class__ = fast_class
+            fast_action.attrs = copy.copy(base_action.attrs)
+            fast_action.associate_with_table(self)
+            self.base_actions[action.name] = fast_action
+
+    @classmethod
+    def render_actions_for(cls, request, datum):
+        """Renders the row actions of a single object, for detail pages.
+
+        Only the parts of the table row actions use are set up: columns
+        aren't copied and checked, and there's no data to index. Row
+        actions can only rely on the table's request, kwargs and data.
+        """
+        table = cls.__new__(cls)
+        table.request = request
+        table.kwargs = {}
+        table.data = [datum]
+        table._init_row_actions()
+        return table.render_row_actions(datum)
+
+    def get_row_url(self, viewname, arg):
+        if viewname not in self._url_prefixes:
+            try:
+                self._url_prefixes[viewname] = reverse(
+                    viewname, args=(_URL_PLACEHOLDER,))
+            except NoReverseMatch:
+                self._url_prefixes[viewname] = None
+        prefix = self._url_prefixes[viewname]
+        if prefix is None:
+            return reverse(viewname, args=(arg,))
+        return prefix.replace(
+            _URL_PLACEHOLDER,
+            quote(str(arg), safe=RFC3986_SUBDELIMS + "/~:@"), 1)
+
+
+class LinkColumn(tables.Column):
+    """A Column linking each row to a view, for a FastRowsMixin table.
+
+    ``link`` is the name of the view, which is passed the row's
+    ``link_arg`` attribute (or its object id), and rows without one aren't
+    linked. ``link_query`` can be a callable returning query parameters to
+    add to the url.
+    """
+
+    def __init__(self, transform, link_arg=None, link_query=None, **kwargs):
+        super(LinkColumn, self).__init__(transform, **kwargs)
+        self.link_arg = link_arg
+        self.link_query = link_query
+
+    def get_link_url(self, datum):
+        if self.link_arg:
+            arg = getattr(datum, self.link_arg)
+        else:
+            arg = self.table.get_object_id(datum)
+        if not arg:
+            return None
+        url = self.table.get_row_url(self.link, arg)
+        if self.link_query:
+            url = "%s?%s" % (url, urlencode(self.link_query(datum)))
+        return url
@@ -19,9 +19,11 @@ from horizon import exceptions
 from horizon import tables
 
 from adjutant_ui.api import adjutant
+from adjutant_ui.content import actions
+from adjutant_ui.content import rendering
 
 
-class CancelTask(tables.DeleteAction):
+class CancelTask(actions.BatchOutcomesMixin, tables.DeleteAction):
     help_text = _("This will cancel all selected tasks.")
 
     @staticmethod
@@ -54,7 +56,7 @@ class CancelTask(tables.DeleteAction):
         return True
 
 
-class ApproveTask(tables.BatchAction):
+class ApproveTask(actions.BatchOutcomesMixin, tables.BatchAction):
     name = "approve"
     help_text = _("This will approve all of the selected tasks.")
     action_type = "danger"
@@ -89,7 +91,7 @@ class ApproveTask(tables.BatchAction):
         return True
 
 
-class ReissueToken(tables.BatchAction):
+class ReissueToken(actions.BatchOutcomesMixin, tables.BatchAction):
     name = "reissue"
     help_text = _("This will reissue tokens for the selected tasks.")
 
@@ -122,7 +124,7 @@ class ReissueToken(tables.BatchAction):
         return True
 
 
-class RevalidateTask(tables.BatchAction):
+class RevalidateTask(actions.BatchOutcomesMixin, tables.BatchAction):
     name = "revalidate"
     help_text = _("Rerun initial validation for the task.")
 
@@ -190,15 +192,18 @@ class UpdateTask(tables.LinkAction):
 
 
 def TaskTypeDisplayFilter(task_type):
+    if not task_type:
+        return task_type
     return task_type.replace("_", " ").title()
 
 
-class TaskTable(tables.DataTable):
+class TaskTable(rendering.FastRowsMixin, tables.DataTable):
     uuid = tables.Column('id', verbose_name=_('Task ID'),
                          hidden=True)
-    task_type = tables.Column('task_type', verbose_name=_('Task Type'),
-                              filters=[TaskTypeDisplayFilter],
-                              link="horizon:management:tasks:detail")
+    task_type = rendering.LinkColumn('task_type',
+                                     verbose_name=_('Task Type'),
+                                     filters=[TaskTypeDisplayFilter],
+                                     link="horizon:management:tasks:detail")
     status = tables.Column('status', verbose_name=_('Status'))
     request_by = tables.Column('request_by', verbose_name=_('Requestee'))
     request_project = tables.Column('request_project',
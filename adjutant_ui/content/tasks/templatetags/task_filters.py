@@ -1,6 +1,8 @@
 from django import template
 import json
 
+from adjutant_ui.api import adjutant
+
 register = template.Library()
 
 
@@ -14,5 +16,12 @@ def pretty_list(value):
     return ', '.join(value)
 
 
+@register.simple_tag
+def json_preview(value):
+    text, truncated = adjutant.json_preview(
+        value, adjutant.get_task_data_preview_size())
+    return {'text': text, 'truncated': truncated}
+
+
 register.filter('pretty_json', pretty_json)
 register.filter('pretty_list', pretty_list)
@@ -19,9 +19,15 @@ from adjutant_ui.content.tasks import views
 
 
 urlpatterns = [
+    re_path(r'^counts/$', views.TaskCountsView.as_view(), name='counts'),
     re_path(r'^(?P<task_id>[^/]+)/$',
             views.TaskDetailView.as_view(),
             name='detail'),
+    re_path(r'^(?P<task_id>[^/]+)/actions/(?P<action_index>\d+)/$',
+            views.TaskPayloadView.as_view(), name='action_data'),
+    re_path(r'^(?P<task_id>[^/]+)/notes/(?P<action_name>[^/]+)/'
+            r'(?P<note_index>\d+)/$',
+            views.TaskPayloadView.as_view(), name='action_notes'),
     re_path(r'^(?P<task_id>[^/]+)/update/$',
             views.UpdateTaskView.as_view(), name='update'),
     re_path(r'^$', views.IndexView.as_view(), name='index'),
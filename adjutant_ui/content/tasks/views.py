@@ -12,8 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from django import http
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
+from django.views import generic
 
 from horizon import exceptions
 from horizon import forms
@@ -22,6 +24,7 @@ from horizon import tabs
 from horizon.utils import memoized
 
 from adjutant_ui.api import adjutant
+from adjutant_ui.content import actions
 from adjutant_ui.content.tasks import forms as task_forms
 from adjutant_ui.content.tasks import tables as task_tables
 from adjutant_ui.content.tasks import tabs as task_tabs
@@ -36,6 +39,25 @@ class IndexView(tabs.TabbedTableView):
     page_title = _("Admin Tasks")
 
 
+class TaskCountsView(generic.View):
+    """Returns the number of tasks in each of the index tabs as JSON.
+
+    The index page loads these after rendering, so the counts never hold
+    up the task tables. Tabs that couldn't be counted are left out.
+    """
+
+    def get(self, request):
+        tab_classes = task_tabs.TaskTabs.tabs
+        outcomes = actions.run_parallel(
+            request, lambda tab: adjutant.task_count(request, tab.filters),
+            tab_classes)
+        counts = dict((tab.slug, count) for tab, (count, error)
+                      in zip(tab_classes, outcomes) if error is None)
+        if not counts:
+            return http.JsonResponse({}, status=503)
+        return http.JsonResponse(counts)
+
+
 class TaskDetailView(tabs.TabView):
     tab_group_class = task_tabs.TaskDetailTabs
     template_name = 'horizon/common/_detail.html'
@@ -53,20 +75,41 @@ class TaskDetailView(tabs.TabView):
 
     def _get_actions(self, task):
         if task.status == 'Approved; Incomplete':
-            table = task_tables.ApprovedTaskTable(self.request)
+            table_class = task_tables.ApprovedTaskTable
         else:
-            table = task_tables.TaskTable(self.request)
-        return table.render_row_actions(task)
+            table_class = task_tables.TaskTable
+        return table_class.render_actions_for(self.request, task)
 
     @memoized.memoized_method
     def get_data(self):
-        return adjutant.task_get(self.request, self.kwargs['task_id']).json()
+        return adjutant.task_document_get(self.request,
+                                          self.kwargs['task_id'])
 
     def get_tabs(self, request, *args, **kwargs):
         task = self.get_data()
         return self.tab_group_class(request, task=task, **kwargs)
 
 
+class TaskPayloadView(generic.View):
+    """Serves the full pretty printed data or notes of a task action.
+
+    The detail tabs only render a preview of large payloads, and fetch the
+    rest from here when asked to.
+    """
+
+    def get(self, request, task_id, action_index=None, action_name=None,
+            note_index=None):
+        if action_name is None:
+            path = ('actions', int(action_index), 'data')
+        else:
+            path = ('action_notes', action_name, int(note_index))
+        try:
+            payload = adjutant.task_payload_get(request, task_id, path)
+        except (exceptions.NotFound, IndexError, KeyError):
+            raise http.Http404()
+        return http.HttpResponse(payload, content_type='text/plain')
+
+
 class UpdateTaskView(forms.ModalFormView):
     form_class = task_forms.UpdateTaskForm
     form_id = "update_user_form"
@@ -85,8 +128,9 @@ class UpdateTaskView(forms.ModalFormView):
     @memoized.memoized_method
     def get_object(self):
         try:
-            return adjutant.task_get(self.request,
-                                     self.kwargs['task_id']).json()
+            return adjutant.task_document_get(self.request,
+                                              self.kwargs['task_id'],
+                                              cached=False)
         except Exception:
             msg = _('Unable to retrieve user.')
             url = reverse('horizon:management:tasks:index')
@@ -11,3 +11,8 @@ ADD_PANEL = 'adjutant_ui.content.notifications.panel.NotificationPanel'
 ADD_INSTALLED_APPS = [
     'adjutant_ui.content.notifications'
 ]
+
+# Keeps the unacknowledged notification count on the nav up to date.
+ADD_JS_FILES = [
+    'adjutant_ui/notifications/unacknowledged_count.js'
+]
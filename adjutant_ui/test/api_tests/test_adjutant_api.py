@@ -0,0 +1,332 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gc
+import json
+import tracemalloc
+from unittest import mock
+
+from django.core.cache import cache
+
+from adjutant_ui.api import adjutant
+from adjutant_ui.test import helpers
+
+
+def mock_response(body, status_code=200):
+    response = mock.Mock(status_code=status_code,
+                         content=json.dumps(body).encode('utf-8'))
+    response.json.return_value = body
+    return response
+
+
+def task_document(task_id='task-1', data=None):
+    return {'uuid': task_id, 'task_type': 'create_project',
+            'keystone_user': {'username': 'admin', 'project_name': 'admin'},
+            'cancelled': False, 'created_on': '2020-01-01',
+            'approved_on': None, 'completed_on': None,
+            'actions': [{'action_name': 'NewProject', 'valid': True,
+                         'data': data or {'name': 'demo'}}],
+            'action_notes': {}}
+
+
+class TaskPayloadTests(helpers.APITestCase):
+
+    def setUp(self):
+        super(TaskPayloadTests, self).setUp()
+        cache.clear()
+
+    @mock.patch.object(adjutant, 'get')
+    def test_payload_uses_cached_document(self, mock_get):
+        mock_get.return_value = mock_response(task_document())
+        path = ('actions', 0, 'data')
+
+        payload = adjutant.task_payload_get(self.request, 'task-1', path)
+        self.assertEqual(json.dumps({'name': 'demo'}, indent=4), payload)
+        self.assertEqual(payload, adjutant.task_payload_get(
+            self.request, 'task-1', path))
+        self.assertEqual(1, mock_get.call_count)
+
+    @mock.patch.object(adjutant, 'get')
+    def test_payload_follows_task_changes(self, mock_get):
+        mock_get.return_value = mock_response(task_document())
+        path = ('actions', 0, 'data')
+        adjutant.task_payload_get(self.request, 'task-1', path)
+
+        updated = task_document(data={'name': 'renamed'})
+        adjutant._task_changed(self.request, 'task-1',
+                               mock_response({'task': updated}))
+        self.assertEqual(
+            json.dumps({'name': 'renamed'}, indent=4),
+            adjutant.task_payload_get(self.request, 'task-1', path))
+        self.assertEqual(1, mock_get.call_count)
+
+    @mock.patch.object(adjutant, 'get')
+    def test_missing_task(self, mock_get):
+        mock_get.return_value = mock_response({'errors': ['No task']}, 404)
+        self.assertRaises(adjutant.exceptions.NotFound,
+                          adjutant.task_payload_get, self.request, 'task-1',
+                          ('actions', 0, 'data'))
+
+
+class TaskRowMemoryTests(helpers.APITestCase):
+    """Checks that a large page of slim rows outlives its documents."""
+
+    page_size = 1000
+
+    def _retained(self, parse):
+        body = json.dumps([task_document('task-%d' % i, data={
+            'email': 'user%d@example.com' % i, 'roles': ['member'] * 20,
+            'notes': 'x' * 1000}) for i in range(self.page_size)])
+        gc.collect()
+        tracemalloc.start()
+        try:
+            rows = [parse(task) for task in json.loads(body)]
+            gc.collect()
+            retained, _peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(self.page_size, len(rows))
+        return retained
+
+    def test_rows_hold_less_than_tasks(self):
+        tasks = self._retained(
+            lambda task: adjutant.task_obj_get(None, task=task))
+        rows = self._retained(adjutant.task_row_get)
+        # The rows only keep a few short fields of each document, where a
+        # TASK keeps all of its actions alive.
+        self.assertLess(rows * 5, tasks)
+
+
+class NotificationIdsTests(helpers.APITestCase):
+
+    @mock.patch.object(adjutant, 'get')
+    def test_ids(self, mock_get):
+        mock_get.return_value = mock_response(
+            {'notifications': [{'uuid': 'n-1'}, {'uuid': 'n-2'}]})
+        self.assertEqual(['n-1', 'n-2'],
+                         adjutant.notification_ids_get(self.request))
+
+    @mock.patch.object(adjutant, 'get')
+    def test_empty_page(self, mock_get):
+        mock_get.return_value = mock_response({'error': 'Empty page'}, 400)
+        self.assertEqual([], adjutant.notification_ids_get(self.request))
+
+    @mock.patch.object(adjutant, 'get')
+    def test_error_is_an_exception(self, mock_get):
+        mock_get.return_value = mock_response({'errors': ['Boom']}, 500)
+        self.assertRaises(Exception, adjutant.notification_ids_get,
+                          self.request)
+
+
+def notification_document(uuid, acknowledged=False):
+    return {'uuid': uuid, 'task': 'task-1', 'error': True,
+            'created_on': '2020-01-01', 'acknowledged': acknowledged,
+            'notes': {'errors': ['Failed']}}
+
+
+def notification_page(count, has_more, acknowledged=False):
+    return {'notifications': [notification_document('n-%d' % i, acknowledged)
+                              for i in range(count)],
+            'has_prev': True, 'has_more': has_more}
+
+
+class NotificationTotalTests(helpers.APITestCase):
+
+    filters = adjutant.UNACKNOWLEDGED_FILTERS
+
+    def setUp(self):
+        super(NotificationTotalTests, self).setUp()
+        cache.clear()
+
+    def _last_page(self):
+        return adjutant.notification_last_page(
+            self.request, filters=self.filters, notifications_per_page=25)
+
+    @mock.patch.object(adjutant, 'get')
+    def test_total_from_last_page(self, mock_get):
+        mock_get.return_value = mock_response(notification_page(10, False))
+        adjutant.notification_list(self.request, filters=self.filters,
+                                   page=2, notifications_per_page=25)
+        self.assertEqual(2, self._last_page())
+
+    @mock.patch.object(adjutant, 'get')
+    def test_total_dropped_when_more_arrive(self, mock_get):
+        mock_get.return_value = mock_response(notification_page(10, False))
+        adjutant.notification_list(self.request, filters=self.filters,
+                                   page=2, notifications_per_page=25)
+
+        mock_get.return_value = mock_response(notification_page(25, True))
+        adjutant.notification_list(self.request, filters=self.filters,
+                                   page=2, notifications_per_page=25)
+        self.assertIsNone(self._last_page())
+
+    @mock.patch.object(adjutant, 'get')
+    def test_earlier_pages_keep_total(self, mock_get):
+        mock_get.return_value = mock_response(notification_page(10, False))
+        adjutant.notification_list(self.request, filters=self.filters,
+                                   page=2, notifications_per_page=25)
+
+        mock_get.return_value = mock_response(notification_page(25, True))
+        adjutant.notification_list(self.request, filters=self.filters,
+                                   page=1, notifications_per_page=25)
+        self.assertEqual(2, self._last_page())
+
+    @mock.patch.object(adjutant, 'post')
+    @mock.patch.object(adjutant, 'get')
+    def test_acknowledge_moves_unacknowledged(self, mock_get, mock_post):
+        mock_get.return_value = mock_response(notification_page(30, False))
+        adjutant.notification_list(self.request, filters=self.filters,
+                                   page=1, notifications_per_page=25)
+        cache.set(adjutant._notification_cache_key(self.request, 'n-old'),
+                  notification_document('n-old', acknowledged=True))
+        mock_post.return_value = mock_response({}, 200)
+
+        adjutant.notifications_acknowlege(
+            self.request, ['n-0', 'n-1', 'n-2', 'n-3', 'n-4', 'n-old'])
+        self.assertEqual(1, self._last_page())
+        self.assertEqual(25, cache.get(adjutant._notification_total_key(
+            self.request, self.filters)))
+
+    @mock.patch.object(adjutant, 'post')
+    @mock.patch.object(adjutant, 'get')
+    def test_acknowledge_unknown_drops_totals(self, mock_get, mock_post):
+        mock_get.return_value = mock_response(notification_page(30, False))
+        adjutant.notification_list(self.request, filters=self.filters,
+                                   page=1, notifications_per_page=25)
+        mock_post.return_value = mock_response({}, 200)
+
+        adjutant.notifications_acknowlege(self.request, ['n-0', 'n-unknown'])
+        self.assertIsNone(self._last_page())
+
+
+class NotificationGroupsTests(helpers.APITestCase):
+
+    def setUp(self):
+        super(NotificationGroupsTests, self).setUp()
+        cache.clear()
+
+    @mock.patch.object(adjutant, 'get')
+    def test_error_is_an_exception(self, mock_get):
+        mock_get.return_value = mock_response({'errors': ['Boom']}, 500)
+        self.assertRaises(Exception, adjutant.notification_groups_get,
+                          self.request)
+
+    @mock.patch('horizon.utils.functions.get_page_size', return_value=2)
+    @mock.patch.object(adjutant, 'task_list')
+    def test_tasks_looked_up_a_page_at_a_time(self, mock_task_list,
+                                              _page_size):
+        def _task_list(request, filters={}, page=1):
+            return [adjutant.task_row_get(task_document(task_id))
+                    for task_id in filters['uuid']['in']], False, False
+        mock_task_list.side_effect = _task_list
+        notifications = [adjutant.NOTIFICATION(
+            uuid='n-%d' % i, notes='', error=True, created_on='2020-01-01',
+            acknowledged=False, task='task-%d' % i) for i in range(5)]
+
+        enriched = adjutant.notification_tasks_get(self.request,
+                                                   notifications)
+        self.assertEqual(3, mock_task_list.call_count)
+        self.assertEqual(['create_project'] * 5,
+                         [n.task_type for n in enriched])
+
+
+class JsonPreviewTests(helpers.APITestCase):
+
+    def test_short_value(self):
+        self.assertEqual(('{\n    "a": 1\n}', False),
+                         adjutant.json_preview({'a': 1}, 100))
+
+    def test_long_value_cut_short(self):
+        value = {'items': list(range(1000))}
+        text, truncated = adjutant.json_preview(value, 50)
+        self.assertTrue(truncated)
+        self.assertEqual(json.dumps(value, indent=4)[:50], text)
+
+    def test_string(self):
+        self.assertEqual(('abc', True), adjutant.json_preview('abcdef', 3))
+
+
+class NotificationSignatureTests(helpers.APITestCase):
+
+    def _signature(self, error):
+        notification = notification_document('n-1')
+        notification['notes'] = {'errors': [error]}
+        return adjutant.notification_signature(notification)
+
+    def test_repeats_share_a_signature(self):
+        self.assertEqual(
+            self._signature('Project 0b3a9f2c-4d1e-4f5a-8b6c-7d8e9f0a1b2c '
+                            'failed after 3 tries'),
+            self._signature('Project 9e8d7c6b5a4f3e2d1c0b9a8f7e6d5c4b '
+                            'failed after  12 tries'))
+
+    def test_different_errors(self):
+        self.assertNotEqual(self._signature('Quota exceeded'),
+                            self._signature('Email failed to send'))
+
+
+class UserSearchTests(helpers.APITestCase):
+
+    index = [
+        (adjutant.USER('u-1', 'Alice', 'alice@example.com',
+                       ['project_admin'], 'Member', 'Active'),
+         'alice', 'alice@example.com', 'member'),
+        (adjutant.USER('u-2', 'Bob', 'bob@example.org', ['_member_'],
+                       'Invited', 'Invited'),
+         'bob', 'bob@example.org', 'invited'),
+    ]
+
+    def _search(self, search_field, search):
+        return [user.id for user in
+                adjutant._user_search(self.index, search_field, search)]
+
+    def test_name_and_email(self):
+        self.assertEqual(['u-1'], self._search('name', 'ALI'))
+        self.assertEqual(['u-2'], self._search('email', 'example.org'))
+
+    def test_cohort_is_exact(self):
+        self.assertEqual(['u-2'], self._search('cohort', 'Invited'))
+        self.assertEqual([], self._search('cohort', 'invite'))
+
+    def test_role_by_shown_name(self):
+        self.assertEqual(['u-1'], self._search('role', 'administrator'))
+        self.assertEqual(['u-2'], self._search('role', '_member_'))
+
+    def test_unknown_field(self):
+        self.assertEqual(['u-1', 'u-2'], self._search('status', 'x'))
+
+
+class ScopedCacheKeyTests(helpers.APITestCase):
+
+    def setUp(self):
+        super(ScopedCacheKeyTests, self).setUp()
+        cache.clear()
+
+    def test_invalidate_scope(self):
+        key = adjutant._scoped_cache_key(self.request, 'user_list', 1)
+        self.assertEqual(
+            key, adjutant._scoped_cache_key(self.request, 'user_list', 1))
+        other = adjutant._scoped_cache_key(self.request, 'task_list', 1)
+
+        adjutant._invalidate_scope(self.request, 'user_list')
+        self.assertNotEqual(
+            key, adjutant._scoped_cache_key(self.request, 'user_list', 1))
+        self.assertEqual(
+            other, adjutant._scoped_cache_key(self.request, 'task_list', 1))
+
+    def test_scoped_to_project(self):
+        key = adjutant._scoped_cache_key(self.request, 'user_list', 1)
+        self.assertNotEqual(key, adjutant._scoped_cache_key(
+            self.request, 'user_list', 1, project_id='2'))
+        adjutant._invalidate_scope(self.request, 'user_list', project_id='2')
+        self.assertEqual(
+            key, adjutant._scoped_cache_key(self.request, 'user_list', 1))
@@ -0,0 +1,101 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import timeit
+from unittest import mock
+
+from django.conf import settings
+from django.test import override_settings
+from django.utils import translation
+
+from adjutant_ui.api import adjutant
+from adjutant_ui.test import helpers
+
+
+class SettingsLookupTests(helpers.APITestCase):
+
+    def setUp(self):
+        super(SettingsLookupTests, self).setUp()
+        adjutant._lookup_tables.clear()
+
+    def test_built_once(self):
+        build = mock.Mock(return_value=frozenset())
+        for _i in range(3):
+            adjutant._settings_lookup('HIDDEN_QUOTAS', {}, build)
+        build.assert_called_once_with({})
+
+    def test_translated_once_per_language(self):
+        text = mock.Mock()
+        text.format.side_effect = lambda: 'Text (%s)' % (
+            translation.get_language())
+        with override_settings(ROLE_TRANSLATIONS={'role': text}):
+            texts = []
+            for language in ['en', 'de', 'en', 'de']:
+                with translation.override(language):
+                    texts.append(adjutant.get_role_text('role'))
+        self.assertEqual(['Text (en)', 'Text (de)'] * 2, texts)
+        self.assertEqual(2, text.format.call_count)
+
+    def test_reset_when_setting_changes(self):
+        self.assertEqual('Project Administrator',
+                         adjutant.get_role_text('project_admin'))
+        self.assertFalse(adjutant._is_quota_hidden('nova', 'cores'))
+        with override_settings(
+                ROLE_TRANSLATIONS={'project_admin': 'Boss'},
+                HIDDEN_QUOTAS={'nova': ['cores']}):
+            self.assertEqual('Boss', adjutant.get_role_text('project_admin'))
+            self.assertTrue(adjutant._is_quota_hidden('nova', 'cores'))
+        self.assertEqual('Project Administrator',
+                         adjutant.get_role_text('project_admin'))
+        self.assertFalse(adjutant._is_quota_hidden('nova', 'cores'))
+
+
+def _old_get_role_text(name):
+    # get_role_text before the lookup tables.
+    role_translations = getattr(settings, 'ROLE_TRANSLATIONS', None)
+    if role_translations is None:
+        role_translations = adjutant.ROLE_TRANSLATIONS
+    if name in role_translations:
+        return role_translations[name].format()
+    return name
+
+
+def _old_is_quota_hidden(service, resource):
+    # _is_quota_hidden before the lookup tables.
+    hidden_quotas = getattr(settings, 'HIDDEN_QUOTAS', None)
+    if hidden_quotas is None:
+        hidden_quotas = adjutant.HIDDEN_QUOTAS
+    return service in hidden_quotas and resource in hidden_quotas[service]
+
+
+@helpers.benchmark
+class SettingsLookupBenchmark(helpers.APITestCase):
+    """Times the lookups against reading the settings on every call."""
+
+    calls = 20000
+
+    def _compare(self, name, old, new, *args):
+        self.assertEqual(old(*args), new(*args))
+        helpers.report_timings(
+            '%d %s' % (self.calls, name),
+            old=min(timeit.repeat(lambda: old(*args), number=self.calls,
+                                  repeat=5)),
+            new=min(timeit.repeat(lambda: new(*args), number=self.calls,
+                                  repeat=5)))
+
+    def test_role_text(self):
+        self._compare('role lookups', _old_get_role_text,
+                      adjutant.get_role_text, 'project_admin')
+
+    def test_hidden_quota(self):
+        self._compare('hidden quota lookups', _old_is_quota_hidden,
+                      adjutant._is_quota_hidden, 'neutron', 'subnetpool')
@@ -0,0 +1,132 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+from unittest import mock
+
+from django.utils.translation import ngettext_lazy
+
+from horizon import exceptions
+from horizon import tables
+
+from adjutant_ui.content import actions
+from adjutant_ui.test import helpers
+
+ITEM = collections.namedtuple('Item', ['id', 'name', 'locked'])
+
+
+def _bulk_outcomes(request, obj_ids):
+    # Fails every id ending in 3, in a single call.
+    return dict((obj_id, (None, exceptions.NotAvailable())
+                 if obj_id.endswith('3') else (obj_id, None))
+                for obj_id in obj_ids)
+
+
+class ParallelAction(actions.BatchOutcomesMixin, tables.BatchAction):
+    name = 'poke'
+
+    @staticmethod
+    def action_present(count):
+        return ngettext_lazy(u"Poke Item", u"Poke Items", count)
+
+    @staticmethod
+    def action_past(count):
+        return ngettext_lazy(u"Poked Item", u"Poked Items", count)
+
+    def action(self, request, obj_id):
+        if obj_id == 'item-2':
+            raise exceptions.NotAvailable()
+
+    def allowed(self, request, item=None):
+        return not (item and item.locked)
+
+
+class BulkAction(ParallelAction):
+    name = 'bulk_poke'
+    bulk_outcomes = staticmethod(_bulk_outcomes)
+
+
+class ItemTable(tables.DataTable):
+    name = tables.Column('name')
+
+    class Meta(object):
+        name = 'items'
+        table_actions = (ParallelAction, BulkAction)
+
+
+class BatchOutcomesMixinTests(helpers.APITestCase):
+
+    def setUp(self):
+        super(BatchOutcomesMixinTests, self).setUp()
+        self.request.path = '/items/'
+        self.items = [ITEM('item-%d' % i, 'Item %d' % i, i == 4)
+                      for i in range(5)]
+        self.table = ItemTable(self.request, data=self.items)
+        self.ids = [item.id for item in self.items]
+
+    def _handle(self, action_name, ids):
+        action = self.table.base_actions[action_name]
+        # Horizon shares action instances between tables of a class.
+        action.success_ids = []
+        with mock.patch('horizon.messages.success'), \
+                mock.patch('horizon.messages.error'), \
+                mock.patch('horizon.messages.info'):
+            action.handle(self.table, self.request, ids)
+        return action
+
+    def test_parallel_outcomes_are_replayed(self):
+        action = self._handle('poke', self.ids)
+        self.assertEqual(['item-0', 'item-1', 'item-3'],
+                         sorted(action.success_ids))
+        self.assertNotIn('action', action.__dict__)
+
+    def test_bulk_outcomes_are_replayed(self):
+        with mock.patch.object(BulkAction, 'bulk_outcomes',
+                               side_effect=_bulk_outcomes) as outcomes:
+            action = self._handle('bulk_poke', self.ids)
+        # The locked item isn't allowed, so isn't handed over.
+        outcomes.assert_called_once_with(self.request, self.ids[:4])
+        self.assertEqual(['item-0', 'item-1', 'item-2'],
+                         sorted(action.success_ids))
+
+    def test_allowed_checked_once(self):
+        with mock.patch.object(ParallelAction, 'allowed',
+                               return_value=True) as allowed:
+            self._handle('poke', self.ids)
+        self.assertEqual(len(self.ids), allowed.call_count)
+
+    def test_nothing_allowed(self):
+        with mock.patch.object(BulkAction, 'bulk_outcomes') as outcomes:
+            action = self._handle('bulk_poke', ['item-4'])
+        outcomes.assert_not_called()
+        self.assertEqual([], action.success_ids)
+
+
+class PagedItemsTests(helpers.APITestCase):
+
+    def test_every_page(self):
+        list_page = mock.Mock(side_effect=[
+            (['a', 'b'], False, True), (['c'], True, False)])
+        self.assertEqual(['a', 'b', 'c'], list(actions.paged_items(
+            self.request, list_page, 'arg', size=2)))
+        list_page.assert_has_calls([mock.call('arg', page=1, size=2),
+                                    mock.call('arg', page=2, size=2)])
+
+    def test_stops_short_on_error(self):
+        list_page = mock.Mock(side_effect=[
+            (['a', 'b'], False, True), exceptions.NotAvailable()])
+        self.assertEqual(['a', 'b'], list(actions.paged_items(
+            self.request, list_page)))
+
+    def test_csv_lines(self):
+        self.assertEqual(['id,name\r\n', '1,"a, b"\r\n'], list(
+            actions.csv_lines(['id', 'name'], [[1, 'a, b']])))
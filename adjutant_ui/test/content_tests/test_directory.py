@@ -0,0 +1,91 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import mock
+
+from django.core.cache import cache
+
+from adjutant_ui.api import adjutant
+from adjutant_ui.content.project_users import directory
+from adjutant_ui.test import helpers
+
+
+def _user(user_id):
+    return adjutant.USER(user_id, user_id, '%s@example.com' % user_id,
+                         ['member'], 'Member', 'Active')
+
+
+@mock.patch.object(directory, '_scoped_token', return_value='token')
+@mock.patch.object(directory.keystone, 'tenant_list')
+class DirectoryTests(helpers.APITestCase):
+
+    def setUp(self):
+        super(DirectoryTests, self).setUp()
+        cache.clear()
+        self.request.user.id = 'admin-id'
+
+    def _projects(self, mock_tenant_list, *project_ids):
+        projects = []
+        for project_id in project_ids:
+            project = mock.Mock(id=project_id)
+            project.name = 'project %s' % project_id
+            projects.append(project)
+        mock_tenant_list.return_value = (projects, False)
+
+    @mock.patch.object(adjutant, '_project_user_list')
+    def test_only_the_admins_projects(self, mock_users, mock_tenant_list,
+                                      _token):
+        self._projects(mock_tenant_list, 'p-1', 'p-2')
+        mock_users.side_effect = lambda request, token: [_user('u')]
+
+        entries, failed = directory.directory_get(self.request)
+        mock_tenant_list.assert_called_once_with(self.request,
+                                                 user='admin-id')
+        self.assertEqual(['p-1', 'p-2'],
+                         sorted(e.project_id for e in entries))
+        self.assertEqual([], failed)
+
+    @mock.patch.object(adjutant, '_project_user_list')
+    def test_cached_projects_not_listed_again(self, mock_users,
+                                              mock_tenant_list, _token):
+        self._projects(mock_tenant_list, 'p-1', 'p-2')
+        mock_users.side_effect = lambda request, token: [_user('u')]
+        directory.directory_get(self.request)
+
+        adjutant.user_directory_refresh(self.request, 'p-2')
+        mock_users.reset_mock()
+        # The generations and users of every project are read in one go
+        # each, rather than a project at a time.
+        with mock.patch.object(cache, 'get_many',
+                               wraps=cache.get_many) as mock_get_many, \
+                mock.patch.object(adjutant, '_scoped_cache_key',
+                                  wraps=adjutant._scoped_cache_key) as \
+                mock_key:
+            entries, _failed = directory.directory_get(self.request)
+        self.assertEqual(2, mock_get_many.call_count)
+        self.assertEqual(1, mock_key.call_count)
+        self.assertEqual(1, mock_users.call_count)
+        self.assertEqual(2, len(entries))
+
+    @mock.patch.object(adjutant, '_project_user_list')
+    def test_failed_projects(self, mock_users, mock_tenant_list, _token):
+        self._projects(mock_tenant_list, 'p-1', 'p-2')
+
+        def _list(request, token):
+            if mock_users.call_count == 2:
+                raise Exception('Forbidden')
+            return [_user('u')]
+        mock_users.side_effect = _list
+
+        entries, failed = directory.directory_get(self.request)
+        self.assertEqual(1, len(entries))
+        self.assertEqual(1, len(failed))
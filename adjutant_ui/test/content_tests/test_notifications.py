@@ -0,0 +1,199 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import override_settings
+
+from adjutant_ui.api import adjutant
+from adjutant_ui.content.notifications import poller
+from adjutant_ui.content.notifications import tables
+from adjutant_ui.content.notifications import tabs
+from adjutant_ui.content.notifications import views
+from adjutant_ui.test import helpers
+from adjutant_ui.test.api_tests.test_adjutant_api import mock_response
+from adjutant_ui.test.api_tests.test_adjutant_api import notification_page
+
+
+class AcknowledgeAllNotificationsTests(helpers.APITestCase):
+
+    def setUp(self):
+        super(AcknowledgeAllNotificationsTests, self).setUp()
+        self.request.path = '/notifications/'
+
+    @mock.patch('horizon.messages.error')
+    @mock.patch.object(adjutant, 'get')
+    def test_listing_error_is_reported(self, mock_get, mock_error):
+        mock_get.return_value = mock_response({'errors': ['Boom']}, 500)
+        response = tables.AcknowledgeAllNotifications().single(
+            None, self.request, None)
+        self.assertEqual(302, response.status_code)
+        mock_error.assert_called_once()
+
+
+class UnacknowledgedNotificationsTabTests(helpers.APITestCase):
+
+    def setUp(self):
+        super(UnacknowledgedNotificationsTabTests, self).setUp()
+        cache.clear()
+        self.tab = tabs.UnacknowledgedNotificationsTab(
+            mock.Mock(kwargs={}), self.request)
+
+    def _page(self, get_params, has_more):
+        self.request.GET = get_params
+        with mock.patch.object(adjutant, 'get') as mock_get, \
+                mock.patch.object(adjutant, 'notification_tasks_get',
+                                  side_effect=lambda r, n: n):
+            mock_get.side_effect = lambda *args, **kwargs: mock_response(
+                notification_page(
+                    20, has_more(kwargs['params']['page'])))
+            self.tab.get_notification_table_data()
+            return [call[1]['params']['page']
+                    for call in mock_get.call_args_list]
+
+    @mock.patch('horizon.utils.functions.get_page_size', return_value=20)
+    def test_pages_past_a_stale_total(self, _page_size):
+        self._page({'task_page': '2'}, lambda page: False)
+        self.assertEqual(2, self.tab._page)
+
+        # Another page has arrived since, so the last known page has more.
+        pages = self._page({'task_page': '3'}, lambda page: page < 3)
+        self.assertEqual([2, 3], pages)
+        self.assertEqual(3, self.tab._page)
+
+
+class UnacknowledgedCountTests(helpers.APITestCase):
+
+    def setUp(self):
+        super(UnacknowledgedCountTests, self).setUp()
+        cache.clear()
+        self.request.method = 'GET'
+
+    def _get(self):
+        response = views.UnacknowledgedCountView.as_view()(self.request)
+        return json.loads(response.content)
+
+    @mock.patch.object(adjutant, 'notification_count', return_value=7)
+    def test_counted_once_per_interval(self, mock_count):
+        self.assertEqual({'count': 7, 'interval': 15}, self._get())
+        self.assertEqual({'count': 7, 'interval': 15}, self._get())
+        mock_count.assert_called_once_with(
+            self.request, filters=adjutant.UNACKNOWLEDGED_FILTERS)
+
+    @mock.patch.object(adjutant, 'notification_count',
+                       side_effect=ValueError())
+    def test_count_failure(self, mock_count):
+        self.assertEqual({'count': None, 'interval': 15}, self._get())
+
+    @override_settings(NOTIFICATION_POLLER_AUTH={'username': 'poller'})
+    @mock.patch.object(poller.poller, 'get_count', return_value=None)
+    @mock.patch.object(adjutant, 'notification_count')
+    def test_poller_count(self, mock_count, mock_get_count):
+        self.assertEqual({'count': None,
+                          'interval': views.COUNT_RETRY_INTERVAL},
+                         self._get())
+        mock_get_count.return_value = 3
+        self.assertEqual({'count': 3, 'interval': 15}, self._get())
+        mock_count.assert_not_called()
+
+
+class UnacknowledgedCountPollerTests(helpers.APITestCase):
+
+    @override_settings(NOTIFICATION_POLLER_AUTH={'username': 'poller'},
+                       NOTIFICATION_POLL_INTERVAL=15)
+    @mock.patch.object(adjutant, 'notification_count', return_value=4)
+    def test_polls_with_own_credentials(self, mock_count):
+        count_poller = poller.UnacknowledgedCountPoller()
+        mock_wake = count_poller._wake = mock.Mock()
+        service_request = poller.SERVICE_REQUEST(user=poller.SERVICE_USER(
+            token=poller.SERVICE_TOKEN(id='poller-token'), tenant_id='svc',
+            service_catalog=[], services_region=None))
+        count_poller._last_asked = poller.time.time()
+        # Nobody asks again after the first poll, so the poller stops.
+        mock_wake.wait.side_effect = lambda interval: setattr(
+            count_poller, '_last_asked', 0)
+        with mock.patch.object(count_poller, '_get_request',
+                               return_value=service_request):
+            count_poller._run()
+
+        mock_count.assert_called_once_with(
+            service_request, filters=adjutant.UNACKNOWLEDGED_FILTERS)
+        self.assertIsNone(count_poller._thread)
+
+
+class CountRefreshTests(helpers.APITestCase):
+
+    @mock.patch.object(poller.poller, 'refresh')
+    @mock.patch.object(adjutant, 'post')
+    def test_acknowledging_drops_count(self, mock_post, mock_refresh):
+        cache.set(poller.COUNT_CACHE_KEY, 9)
+        mock_post.return_value = mock_response({}, 200)
+        adjutant.notifications_acknowlege(self.request, ['n-1'])
+        self.assertIsNone(cache.get(poller.COUNT_CACHE_KEY))
+        mock_refresh.assert_called_once_with()
+
+    @mock.patch.object(adjutant, 'post')
+    def test_failed_acknowledge_keeps_count(self, mock_post):
+        cache.set(poller.COUNT_CACHE_KEY, 9)
+        mock_post.return_value = mock_response({}, 500)
+        adjutant.notifications_acknowlege(self.request, ['n-1'])
+        self.assertEqual(9, cache.get(poller.COUNT_CACHE_KEY))
+
+    def test_refresh_wakes_poller(self):
+        count_poller = poller.UnacknowledgedCountPoller()
+        count_poller.count = 9
+        count_poller.refresh()
+        self.assertIsNone(count_poller.count)
+        self.assertTrue(count_poller._wake.is_set())
+
+
+class NotificationGroupsTabTests(helpers.APITestCase):
+
+    def setUp(self):
+        super(NotificationGroupsTabTests, self).setUp()
+        self.tab = tabs.NotificationGroupsTab(mock.Mock(kwargs={}),
+                                              self.request)
+
+    def test_only_loaded_when_asked(self):
+        self.assertFalse(self.tab.preload)
+
+    @mock.patch('horizon.utils.functions.get_page_size', return_value=2)
+    @mock.patch.object(adjutant, 'notification_tasks_get',
+                       side_effect=lambda request, groups: groups)
+    @mock.patch.object(adjutant, 'notification_groups_get')
+    def test_groups_are_paged(self, mock_groups, _tasks, _page_size):
+        mock_groups.return_value = (list(range(5)), True)
+        pages = []
+        for page in ['1', '3', '9']:
+            self.request.GET = {'group_page': page}
+            pages.append((self.tab.get_notification_groups_data(),
+                          self.tab._prev, self.tab._more))
+        self.assertEqual([([0, 1], False, True),
+                          ([4], True, False),
+                          ([4], True, False)], pages)
+
+
+class NotificationExportTests(helpers.APITestCase):
+
+    @mock.patch.object(adjutant, 'get')
+    def test_export_stops_short_on_error(self, mock_get):
+        mock_get.side_effect = [
+            mock_response(notification_page(2, True)),
+            mock_response({'errors': ['Boom']}, 500)]
+        self.request.method = 'GET'
+        self.request.GET = {'format': 'ndjson'}
+
+        response = views.NotificationExportView.as_view()(self.request)
+        rows = [json.loads(row) for row in response.streaming_content]
+        self.assertEqual(['n-0', 'n-1'], [row['uuid'] for row in rows])
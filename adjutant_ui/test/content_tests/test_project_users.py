@@ -0,0 +1,290 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.http import QueryDict
+from django.urls import reverse
+
+from adjutant_ui.api import adjutant
+from adjutant_ui.content.project_users import forms
+from adjutant_ui.content.project_users import views
+from adjutant_ui.test import helpers
+from adjutant_ui.test.api_tests.test_adjutant_api import mock_response
+
+
+ROLE_CHOICES = [('member', 'Member'), ('admin', 'Admin')]
+
+
+@mock.patch.object(forms, 'get_role_choices', return_value=ROLE_CHOICES)
+class UpdateUserFormTests(helpers.APITestCase):
+
+    def setUp(self):
+        super(UpdateUserFormTests, self).setUp()
+        cache.clear()
+        self.request.path = '/management/project_users/'
+
+    def _handle(self, original_roles, roles):
+        form = forms.UpdateUserForm(self.request, data={
+            'id': 'user-1', 'name': 'demo',
+            'original_roles': json.dumps(original_roles),
+            'roles': roles})
+        self.assertTrue(form.is_valid(), form.errors)
+        return form.handle(self.request, form.cleaned_data)
+
+    @mock.patch.object(adjutant, 'user_roles_add')
+    @mock.patch.object(adjutant, 'get')
+    def test_stale_cached_user_is_not_trusted(self, mock_get, mock_add,
+                                              _roles):
+        # The cached copy still has the roles the form was opened with,
+        # but someone has since added admin.
+        cache.set(adjutant._user_cache_key(self.request, 'user-1'),
+                  {'id': 'user-1', 'roles': ['member']})
+        mock_get.return_value = mock_response(
+            {'id': 'user-1', 'roles': ['member', 'admin']})
+
+        with mock.patch.object(forms.messages, 'error') as mock_error:
+            self.assertFalse(self._handle(['member'], ['member', 'admin']))
+        mock_error.assert_called_once()
+        mock_add.assert_not_called()
+        self.assertEqual(
+            ['member', 'admin'], adjutant.user_get(self.request,
+                                                   'user-1')['roles'])
+
+    @mock.patch.object(adjutant, 'user_roles_add')
+    @mock.patch.object(adjutant, 'get')
+    def test_roles_added(self, mock_get, mock_add, _roles):
+        mock_get.return_value = mock_response(
+            {'id': 'user-1', 'roles': ['member']})
+        mock_add.return_value = mock.Mock(status_code=202)
+
+        with mock.patch.object(forms.messages, 'success'):
+            self.assertTrue(self._handle(['member'], ['member', 'admin']))
+        mock_add.assert_called_once_with(self.request, 'user-1', ['admin'])
+
+
+class ParseInvitesTests(helpers.APITestCase):
+
+    role_names = ['member', 'admin']
+
+    def test_header_skipped(self):
+        invites, errors = forms.parse_invites(
+            'Username,Email,Roles\n'
+            'alice,alice@example.com,member;admin\n'
+            '\n'
+            'bob, bob@example.com ,member admin\n', self.role_names)
+        self.assertEqual([], errors)
+        self.assertEqual([
+            (2, {'username': 'alice', 'email': 'alice@example.com',
+                 'roles': ['member', 'admin']}),
+            (4, {'username': 'bob', 'email': 'bob@example.com',
+                 'roles': ['member', 'admin']}),
+        ], invites)
+
+    def test_duplicate_emails(self):
+        invites, errors = forms.parse_invites(
+            'alice,alice@example.com,member\n'
+            'alice2,ALICE@example.com,member\n', self.role_names)
+        self.assertEqual([1], [line for line, _invite in invites])
+        self.assertEqual(1, len(errors))
+        self.assertIn('Line 2', str(errors[0]))
+
+    def test_invalid_email(self):
+        invites, errors = forms.parse_invites('alice,alice,member\n',
+                                              self.role_names)
+        self.assertEqual([], invites)
+        self.assertIn('Line 1', str(errors[0]))
+
+    def test_missing_username(self):
+        invites, errors = forms.parse_invites(',alice@example.com,member\n',
+                                              self.role_names)
+        self.assertEqual([], invites)
+        self.assertIn('No username', str(errors[0]))
+
+    def test_invalid_roles(self):
+        invites, errors = forms.parse_invites(
+            'alice,alice@example.com,member;owner\n'
+            'bob,bob@example.com\n', self.role_names)
+        self.assertEqual([], invites)
+        self.assertEqual(2, len(errors))
+        self.assertIn('member, admin', str(errors[0]))
+
+    def test_username_is_email(self):
+        invites, errors = forms.parse_invites(
+            ',alice@example.com,member\n'
+            'ignored,bob@example.com,admin\n', self.role_names,
+            username_is_email=True)
+        self.assertEqual([], errors)
+        self.assertEqual([
+            (1, {'email': 'alice@example.com', 'roles': ['member']}),
+            (2, {'email': 'bob@example.com', 'roles': ['admin']}),
+        ], invites)
+
+
+class UserExportTests(helpers.APITestCase):
+
+    @mock.patch.object(adjutant, 'user_list_page')
+    def test_export(self, mock_list):
+        mock_list.side_effect = [
+            ([adjutant.USER('u-1', 'alice', 'alice@example.com',
+                            ['member', 'admin'], 'Member', 'Active')],
+             False, True),
+            ([adjutant.USER('u-2', 'bob', 'bob@example.com', ['member'],
+                            'Invited', 'Invited')], True, False)]
+        self.request.method = 'GET'
+
+        response = views.UserExportView.as_view()(self.request)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            ['id,name,email,roles,role_names,status,cohort',
+             'u-1,alice,alice@example.com,member admin,"member, admin",'
+             'Active,Member',
+             'u-2,bob,bob@example.com,member,member,Invited,Invited'],
+            lines)
+        self.assertEqual('attachment; filename="project_users.csv"',
+                         response['Content-Disposition'])
+
+
+class UserRowsTests(helpers.APITestCase):
+
+    def setUp(self):
+        super(UserRowsTests, self).setUp()
+        # Panel urls are only registered once the dashboard's are loaded.
+        reverse('horizon:management:project_users:index')
+        self.request.method = 'GET'
+
+    @mock.patch.object(adjutant, 'user_list')
+    def test_rows(self, mock_list):
+        mock_list.return_value = [
+            adjutant.USER('u-1', 'alice', 'alice@example.com', ['member'],
+                          'Member', 'Active'),
+            adjutant.USER('u-2', 'bob', 'bob@example.com', ['member'],
+                          'Invited', 'Invited')]
+        self.request.GET = QueryDict('id=u-1&id=u-2&id=u-gone')
+
+        response = views.UserRowsView.as_view()(self.request)
+        rows = json.loads(response.content)
+        mock_list.assert_called_once_with(self.request)
+        self.assertEqual(['u-1', 'u-2', 'u-gone'], sorted(rows))
+        self.assertIn('alice@example.com', rows['u-1'])
+        self.assertIn('bob@example.com', rows['u-2'])
+        self.assertTrue(rows['u-1'].lstrip().startswith('<tr'))
+        self.assertIsNone(rows['u-gone'])
+
+    @mock.patch.object(adjutant, 'user_list', side_effect=ValueError())
+    def test_list_failure(self, _mock_list):
+        self.request.GET = QueryDict('id=u-1')
+        response = views.UserRowsView.as_view()(self.request)
+        self.assertEqual(503, response.status_code)
+
+
+@mock.patch.object(forms, 'get_role_choices', return_value=ROLE_CHOICES)
+class BulkInviteUserFormTests(helpers.APITestCase):
+
+    def setUp(self):
+        super(BulkInviteUserFormTests, self).setUp()
+        cache.clear()
+        self.request.session = mock.Mock(spec=[])
+
+    @mock.patch.object(forms.messages, 'error')
+    @mock.patch.object(forms.messages, 'success')
+    @mock.patch.object(adjutant, 'user_invite')
+    def test_results_kept_out_of_session(self, mock_invite, _success,
+                                         _error, _roles):
+        mock_invite.side_effect = lambda request, invite: mock.Mock(
+            status_code=500 if invite['username'] == 'bob' else 202)
+        form = forms.BulkInviteUserForm(self.request, data={
+            'invite_text': 'alice,alice@example.com,member\n'
+                           'bob,bob@example.com,admin\n'})
+        self.assertTrue(form.is_valid(), form.errors)
+        form.handle(self.request, form.cleaned_data)
+
+        results = forms.get_results(self.request,
+                                    forms.BULK_INVITE_RESULTS_KEY)
+        self.assertEqual([('alice', True), ('bob', False)],
+                         [(r['username'], r['invited']) for r in results])
+        self.assertEqual([], forms.get_results(
+            self.request, forms.BULK_ROLES_RESULTS_KEY))
+
+
+@mock.patch.object(forms.messages, 'error')
+@mock.patch.object(forms.messages, 'success')
+@mock.patch.object(forms, 'get_role_choices', return_value=ROLE_CHOICES)
+@mock.patch.object(adjutant, 'user_roles_remove')
+@mock.patch.object(adjutant, 'user_roles_add')
+@mock.patch.object(adjutant, 'user_list')
+class UpdateUsersRolesFormTests(helpers.APITestCase):
+
+    project_users = [
+        # Already has admin.
+        adjutant.USER('u-same', 'same', 'same@example.com',
+                      ['member', 'admin'], 'Member', 'Active'),
+        # Would be left with no roles.
+        adjutant.USER('u-last', 'last', 'last@example.com', ['member'],
+                      'Member', 'Active'),
+        adjutant.USER('u-add', 'add', 'add@example.com', ['member', 'x'],
+                      'Member', 'Active'),
+        adjutant.USER('u-fail', 'fail', 'fail@example.com', ['member', 'x'],
+                      'Member', 'Active'),
+        adjutant.USER('u-invited', 'invited', 'invited@example.com',
+                      ['member'], 'Invited', 'Invited'),
+    ]
+
+    def setUp(self):
+        super(UpdateUsersRolesFormTests, self).setUp()
+        cache.clear()
+
+    def _handle(self, user_ids, roles_add=(), roles_remove=()):
+        form = forms.UpdateUsersRolesForm(self.request, data={
+            'user_ids': ','.join(user_ids), 'roles_add': list(roles_add),
+            'roles_remove': list(roles_remove)})
+        self.assertTrue(form.is_valid(), form.errors)
+        form.handle(self.request, form.cleaned_data)
+        return dict((r['id'], r) for r in forms.get_results(
+            self.request, forms.BULK_ROLES_RESULTS_KEY))
+
+    def test_unchanged_users_not_called(self, mock_list, mock_add,
+                                        mock_remove, *_mocks):
+        mock_list.return_value = self.project_users
+        results = self._handle(['u-same'], roles_add=['admin'])
+        self.assertEqual('unchanged', results['u-same']['status'])
+        mock_add.assert_not_called()
+        mock_remove.assert_not_called()
+
+    def test_losing_every_role_skipped(self, mock_list, mock_add,
+                                       mock_remove, *_mocks):
+        mock_list.return_value = self.project_users
+        results = self._handle(['u-last'], roles_remove=['member'])
+        self.assertEqual('skipped', results['u-last']['status'])
+        mock_remove.assert_not_called()
+
+    def test_updated_and_failed(self, mock_list, mock_add, mock_remove,
+                                *_mocks):
+        mock_list.return_value = self.project_users
+        mock_add.return_value = mock.Mock(status_code=202)
+        mock_remove.side_effect = lambda request, user_id, roles: mock.Mock(
+            status_code=500 if user_id == 'u-fail' else 202)
+
+        results = self._handle(['u-add', 'u-fail', 'u-invited', 'u-gone'],
+                               roles_add=['admin'], roles_remove=['member'])
+        self.assertEqual({'u-add': 'updated', 'u-fail': 'failed'},
+                         dict((user_id, r['status'])
+                              for user_id, r in results.items()))
+        self.assertEqual(['admin'], results['u-add']['roles_added'])
+        self.assertEqual(['member'], results['u-add']['roles_removed'])
+        mock_add.assert_has_calls([
+            mock.call(self.request, 'u-add', ['admin']),
+            mock.call(self.request, 'u-fail', ['admin'])], any_order=True)
+        self.assertEqual(2, mock_add.call_count)
+        self.assertEqual(2, mock_remove.call_count)
@@ -0,0 +1,86 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+from unittest import mock
+
+from django.core.cache import cache
+
+from adjutant_ui.api import adjutant
+from adjutant_ui.content.tasks import views
+from adjutant_ui.test import helpers
+from adjutant_ui.test.api_tests.test_adjutant_api import mock_response
+from adjutant_ui.test.api_tests.test_adjutant_api import task_document
+
+
+class TaskCountsTests(helpers.APITestCase):
+
+    def setUp(self):
+        super(TaskCountsTests, self).setUp()
+        cache.clear()
+        self.request.method = 'GET'
+
+    @mock.patch.object(adjutant, 'get')
+    def test_failed_tab_left_out(self, mock_get):
+        def _get(request, url, params, headers):
+            if json.loads(params['filters']) == {
+                    'completed': {'exact': True}}:
+                return mock_response({'errors': ['Boom']}, 500)
+            return mock_response({'tasks': [task_document()], 'pages': 3,
+                                  'has_more': True})
+        mock_get.side_effect = _get
+
+        response = views.TaskCountsView.as_view()(self.request)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual({'active': 3, 'approved': 3, 'cancelled': 3},
+                         json.loads(response.content))
+
+    @mock.patch.object(adjutant, 'get')
+    def test_every_tab_failed(self, mock_get):
+        mock_get.return_value = mock_response({'errors': ['Boom']}, 500)
+        response = views.TaskCountsView.as_view()(self.request)
+        self.assertEqual(503, response.status_code)
+
+
+class TaskRevalidateTests(helpers.APITestCase):
+
+    def setUp(self):
+        super(TaskRevalidateTests, self).setUp()
+        cache.clear()
+
+    @mock.patch.object(adjutant, 'put')
+    @mock.patch.object(adjutant, 'get')
+    def test_stale_cached_document_not_written_back(self, mock_get,
+                                                    mock_put):
+        cache.set(adjutant._task_cache_key(self.request, 'task-1'),
+                  task_document(data={'name': 'stale'}))
+        mock_get.return_value = mock_response(
+            task_document(data={'name': 'edited elsewhere'}))
+        mock_put.return_value = mock_response({}, 202)
+
+        adjutant.task_revalidate(self.request, 'task-1')
+        self.assertEqual({'name': 'edited elsewhere'},
+                         json.loads(mock_put.call_args[1]['data']))
+
+    @mock.patch.object(adjutant, 'get')
+    def test_update_form_reads_fresh_task(self, mock_get):
+        cache.set(adjutant._task_cache_key(self.request, 'task-1'),
+                  task_document(data={'name': 'stale'}))
+        mock_get.return_value = mock_response(
+            task_document(data={'name': 'edited elsewhere'}))
+
+        view = views.UpdateTaskView()
+        view.request = self.request
+        view.kwargs = {'task_id': 'task-1'}
+        task = view.get_object()
+        self.assertEqual({'name': 'edited elsewhere'},
+                         task['actions'][0]['data'])
@@ -10,8 +10,26 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+import sys
+import unittest
+
 from openstack_dashboard.test import helpers
 
+# Benchmarks time the dashboard's fast paths against the code they
+# replaced. Timings are too noisy to pass or fail on, so benchmarks only
+# run when asked for, with ``tox -e benchmarks``, and report what they
+# measured.
+benchmark = unittest.skipUnless(os.environ.get('ADJUTANT_UI_BENCHMARKS'),
+                                'Set ADJUTANT_UI_BENCHMARKS to run.')
+
+
+def report_timings(name, **timings):
+    """Writes the timings of a benchmark, given in seconds."""
+    sys.stderr.write('\n%s: %s\n' % (name, ', '.join(
+        '%s %.1fms' % (label, seconds * 1000)
+        for label, seconds in sorted(timings.items()))))
+
 
 class APITestCase(helpers.APITestCase):
     """Extends the base Horizon APITestCase for adjutantclient"""